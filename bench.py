@@ -0,0 +1,210 @@
+"""
+Pruebas de rendimiento de la API.
+
+Usa el proveedor de precios local (sin red) y archivos SQLite temporales, así los resultados son reproducibles.
+
+Ejemplo de uso:
+    python bench.py workers --workers 1 2 4 --duration 10
+    python bench.py json
+    python bench.py coldstart --runs 5 --target 2.0
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+BENCH_USER = "bench"
+
+# Rutas que se consultan en cada prueba (se reparten por igual entre las peticiones).
+PATHS = [
+    "/",
+    f"/portfolios/{BENCH_USER}",
+    "/stocks/AAPL/price?date=2023-04-10",
+    f"/portfolios/{BENCH_USER}/performance?start_date=2023-01-01&end_date=2023-06-01",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, data_dir: str, poll: float = 0.1) -> subprocess.Popen:
+    """Arranca serve.py con el proveedor local y espera a que responda."""
+    env = dict(
+        os.environ,
+        PRICE_PROVIDER="local",
+        PRICE_CACHE_PATH=os.path.join(data_dir, "prices.sqlite"),
+        PORTFOLIOS_DB_PATH=os.path.join(data_dir, "portfolios.sqlite"),
+        CLOSE_STORE_DIR=os.path.join(data_dir, "closes"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(poll)
+    process.kill()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+async def _load(base_url: str, duration: float, concurrency: int) -> int:
+    done = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def worker(offset: int):
+            nonlocal done
+            i = offset
+            while time.monotonic() < deadline:
+                response = await client.get(PATHS[i % len(PATHS)])
+                response.raise_for_status()
+                done += 1
+                i += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return done
+
+
+def _client_process(base_url: str, duration: float, concurrency: int, results):
+    results.put(asyncio.run(_load(base_url, duration, concurrency)))
+
+
+def measure(base_url: str, duration: float, clients: int, concurrency: int) -> float:
+    """Lanza `clients` procesos de carga (para que el cliente no sea el cuello de botella) y devuelve req/s."""
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_client_process, args=(base_url, duration, concurrency, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / duration
+
+
+def bench_workers(args):
+    """Mide req/s para cada número de workers."""
+    print(f"{'workers':>8} {'req/s':>10} {'req/s por worker':>18}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as data_dir:
+            port = free_port()
+            server = start_server(workers, port, data_dir)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                httpx.post(f"{base_url}/portfolios/{BENCH_USER}", json={"stocks": {"AAPL": 60, "MSFT": 40}})
+                measure(base_url, 1, 1, 4) # Calentamiento: llena la caché de precios.
+                rate = measure(base_url, args.duration, args.clients, args.concurrency)
+            finally:
+                server.terminate()
+                server.wait()
+        print(f"{workers:>8} {rate:>10.0f} {rate / workers:>18.0f}")
+
+
+def bench_coldstart(args):
+    """
+    Mide el arranque en frío: tiempo desde que se lanza serve.py (un worker) hasta la primera respuesta de GET /.
+
+    Termina con código 1 si la mediana supera args.target segundos.
+    """
+    timings = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as data_dir:
+            port = free_port()
+            start = time.perf_counter()
+            server = start_server(1, port, data_dir, poll=0.01)
+            timings.append(time.perf_counter() - start)
+            server.terminate()
+            server.wait()
+        print(f"{timings[-1]:.3f} s")
+    median = sorted(timings)[len(timings) // 2]
+    print(f"mediana: {median:.3f} s (objetivo: {args.target:.3f} s)")
+    if median > args.target:
+        sys.exit(1)
+
+
+def bench_json(args):
+    """
+    Compara el CPU por respuesta de JSONResponse con FastJSONResponse (orjson).
+
+    Una ruta que devuelve un diccionario pasa siempre por jsonable_encoder antes de render, con cualquiera de las dos
+    clases: la columna "orjson" mide ese camino. La columna "directo" mide una ruta que construye y devuelve la
+    respuesta ella misma (FastJSONResponse(datos)), sin jsonable_encoder.
+    """
+    import numpy as np
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from responses import FastJSONResponse
+
+    payloads = {
+        "get_portfolio": {"user_id": "user123", "portfolio": {"AAPL": 40.0, "MSFT": 35.0, "GOOG": 25.0}},
+        "get_stock": {"symbol": "AAPL", "price": "120 USD"},
+        "price": {"symbol": "MSFT", "requested_date": "2023-04-09", "closest_date": "2023-04-10", "closing_price": np.float64(291.6)},
+    }
+    print(f"{'respuesta':>14} {'json (µs)':>10} {'orjson (µs)':>12} {'ahorro':>8} {'directo (µs)':>13} {'ahorro':>8}")
+    for name, payload in payloads.items():
+        timings = []
+        renders = (
+            lambda: JSONResponse(jsonable_encoder(payload)),
+            lambda: FastJSONResponse(jsonable_encoder(payload)),
+            lambda: FastJSONResponse(payload),
+        )
+        for render in renders:
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                render()
+            timings.append((time.perf_counter() - start) / args.iterations * 1e6)
+        print(
+            f"{name:>14} {timings[0]:>10.2f} {timings[1]:>12.2f} {1 - timings[1] / timings[0]:>8.0%}"
+            f" {timings[2]:>13.2f} {1 - timings[2] / timings[0]:>8.0%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento de la API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    workers = commands.add_parser("workers", help="req/s según el número de workers de uvicorn")
+    workers.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    workers.add_argument("--duration", type=float, default=10, help="Segundos de carga por configuración")
+    workers.add_argument("--clients", type=int, default=4, help="Procesos que generan carga")
+    workers.add_argument("--concurrency", type=int, default=32, help="Peticiones simultáneas por proceso")
+    workers.set_defaults(func=bench_workers)
+
+    json_bench = commands.add_parser("json", help="CPU por respuesta: json estándar vs orjson")
+    json_bench.add_argument("--iterations", type=int, default=100_000)
+    json_bench.set_defaults(func=bench_json)
+
+    coldstart = commands.add_parser("coldstart", help="Segundos desde el arranque hasta la primera respuesta")
+    coldstart.add_argument("--runs", type=int, default=5)
+    coldstart.add_argument("--target", type=float, default=2.0, help="Mediana máxima aceptada (segundos)")
+    coldstart.set_defaults(func=bench_coldstart)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Lectura por partes de portafolios enviados en bloque (NDJSON o CSV).
+
+El cuerpo de la petición se recorre a medida que llega, sin cargarlo entero en memoria. Cada generador produce
+tuplas (línea, registro, error): registro es {"user_id": ..., "stocks": {...}} sin validar, o None si la línea
+no se pudo leer (y entonces error explica por qué).
+
+Formatos:
+- NDJSON: un objeto por línea, {"user_id": "u1", "stocks": {"AAPL": 60, "MSFT": 40}}.
+- CSV: formato largo con cabecera user_id,symbol,weight y una fila por posición. Las filas de un mismo usuario
+  deben ir seguidas.
+"""
+
+import csv
+
+import orjson
+
+
+CSV_HEADER = ["user_id", "symbol", "weight"]
+
+
+async def lines(chunks):
+    """Divide los bloques de bytes en líneas de texto (número de línea, texto), omitiendo las vacías."""
+    pending = b""
+    number = 0
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            number += 1
+            if line.strip():
+                yield number, line.decode("utf-8", errors="replace").rstrip("\r")
+    if pending.strip():
+        yield number + 1, pending.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def ndjson_records(chunks):
+    async for number, line in lines(chunks):
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield number, record, None
+
+
+async def csv_records(chunks):
+    user_id, stocks, first = None, {}, 0
+    header = None
+    async for number, line in lines(chunks):
+        row = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in row]
+            if header != CSV_HEADER:
+                yield number, None, f"La cabecera debe ser {','.join(CSV_HEADER)}"
+                return
+            continue
+        if len(row) != 3:
+            yield number, None, "Cada fila debe tener user_id,symbol,weight"
+            continue
+        if row[0] != user_id:
+            if user_id is not None:
+                yield first, {"user_id": user_id, "stocks": stocks}, None
+            user_id, stocks, first = row[0], {}, number
+        stocks[row[1]] = row[2] # Se valida (y convierte a número) junto con el resto del registro
+    if user_id is not None:
+        yield first, {"user_id": user_id, "stocks": stocks}, None
+
+
+def ndjson_export(batches):
+    """Un portafolio por línea, {"user_id": ..., "stocks": {...}}, a partir de los bloques de PortfolioStore.iter_rows."""
+    for rows in batches:
+        # El JSON de stocks se copia tal como está guardado, sin decodificarlo y volver a codificarlo.
+        yield b"".join(b'{"user_id":' + orjson.dumps(user_id) + b',"stocks":' + stocks.encode() + b'}\n' for user_id, stocks in rows)
+
+
+PARSERS = {
+    "ndjson": ndjson_records,
+    "csv": csv_records,
+}
@@ -0,0 +1,189 @@
+"""
+Cierres diarios en archivos mapeados en memoria, compartidos entre procesos.
+
+Cada símbolo tiene un archivo <SYMBOL>.closes con una cabecera fija y tres arrays:
+
+    magic (8 bytes) | start_day, end_day, count (int64) | days (int32 x count) | cents (int32 x count)
+    | adjusted (float32 x count)
+
+[start_day, end_day) es el rango de sesiones cerradas que cubre el archivo. Todos los workers mapean el mismo
+archivo en modo lectura: los datos viven una sola vez en la caché de páginas del sistema operativo y las lecturas
+son vistas de NumPy sobre esas páginas, sin copias.
+
+Los archivos se derivan de la caché de precios (SQLite), que sigue siendo la fuente de verdad. Un hilo escritor los
+regenera cuando la caché cubre más sesiones: escribe un archivo temporal y lo reemplaza con os.replace, así que un
+lector ve siempre la versión anterior completa o la nueva completa. Si dos workers regeneran el mismo símbolo a la
+vez, ambos escriben lo mismo y gana el último.
+"""
+
+import logging
+import os
+import queue
+import struct
+import tempfile
+import threading
+from datetime import date
+
+import numpy as np
+
+from price_cache import to_day
+from symbols import check_symbol, is_valid_symbol
+from timeseries import ClosePrices
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"CLOSES3\0" # Los formatos anteriores (cierres en float32) se ignoran y se regeneran
+HEADER = struct.Struct("<8sqqq")
+
+
+class _Mapping:
+    """Archivo mapeado de un símbolo."""
+
+    __slots__ = ("inode", "start", "end", "days", "cents", "adjusted")
+
+    def __init__(self, path: str, inode: int):
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, start, end, count = HEADER.unpack(bytes(data[:HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError(f"{path} no es un archivo de cierres")
+        offset = HEADER.size
+        self.inode = inode
+        self.start = start
+        self.end = end
+        self.days = data[offset:offset + 4 * count].view(np.int32)
+        self.cents = data[offset + 4 * count:offset + 8 * count].view(np.int32)
+        self.adjusted = data[offset + 8 * count:offset + 12 * count].view(np.float32)
+
+
+class CloseStore:
+    """
+    Almacén de cierres por símbolo en archivos mapeados en memoria.
+
+    Parámetros:
+    - directory: Carpeta de los archivos (se crea si no existe).
+    - price_cache: PriceCache de la que se leen los cierres al regenerar un archivo.
+    """
+
+    def __init__(self, directory: str, price_cache):
+        self.directory = directory
+        self.price_cache = price_cache
+        os.makedirs(directory, exist_ok=True)
+        self._mappings: dict[str, _Mapping] = {}
+        self._pending: dict[str, tuple[date, date]] = {} # símbolo -> último rango pedido, aún sin procesar
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="close-store-writer", daemon=True)
+        self._writer.start()
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{check_symbol(symbol)}.closes") # ValueError si el símbolo no es válido
+
+    def get(self, symbol: str, start: date, end: date) -> ClosePrices | None:
+        """
+        Cierres de [start, end) leídos del archivo mapeado, sin copiar.
+
+        Retorna:
+        ClosePrices (vistas sobre el archivo), o None si el archivo no existe o no cubre todo el rango.
+        """
+        symbol = symbol.upper()
+        lo, hi = to_day(start), to_day(end)
+        mapping = self._mappings.get(symbol)
+        if mapping is None or not mapping.start <= lo <= hi <= mapping.end:
+            # Otro worker (o el escritor) puede haber reemplazado el archivo con un rango más amplio.
+            mapping = self._remap(symbol)
+            if mapping is None or not mapping.start <= lo <= hi <= mapping.end:
+                return None
+        first, last = np.searchsorted(mapping.days, [lo, hi])
+        return ClosePrices(mapping.days[first:last], mapping.cents[first:last], mapping.adjusted[first:last])
+
+    def _remap(self, symbol: str) -> _Mapping | None:
+        try:
+            inode = os.stat(self.path(symbol)).st_ino
+        except FileNotFoundError:
+            return None
+        mapping = self._mappings.get(symbol)
+        if mapping is None or mapping.inode != inode:
+            try:
+                mapping = _Mapping(self.path(symbol), inode)
+            except ValueError:
+                return None # Formato anterior: el escritor lo reemplaza la próxima vez que se pida el símbolo
+            self._mappings[symbol] = mapping
+        return mapping
+
+    def hydrate(self) -> int:
+        """
+        Mapea todos los archivos de la carpeta y recorre sus páginas para que queden en la caché del sistema operativo.
+
+        Retorna:
+        Número de símbolos mapeados.
+        """
+        count = 0
+        for name in os.listdir(self.directory):
+            symbol = name.removesuffix(".closes")
+            if not name.endswith(".closes") or not is_valid_symbol(symbol): # Temporales (.SYMBOL.xxx.tmp) u otros archivos
+                continue
+            mapping = self._remap(symbol)
+            if mapping is not None:
+                mapping.days.sum(), mapping.cents.sum(), mapping.adjusted.sum() # Lee cada página una vez
+                count += 1
+        return count
+
+    def schedule(self, symbol: str, start: date, end: date):
+        """Pide al escritor (en segundo plano) que regenere el archivo del símbolo para que cubra [start, end)."""
+        symbol = symbol.upper()
+        with self._lock:
+            queued = symbol in self._pending
+            self._pending[symbol] = (start, end)
+        if not queued:
+            self._queue.put(symbol)
+
+    def _write_loop(self):
+        while True:
+            symbol = self._queue.get()
+            with self._lock:
+                start, end = self._pending.pop(symbol)
+            try:
+                self.rebuild(symbol, start, end)
+            except Exception:
+                logger.exception("No se pudo regenerar el archivo de cierres de %s", symbol)
+
+    def rebuild(self, symbol: str, start: date, end: date):
+        """
+        Regenera el archivo del símbolo con el rango continuo de la caché de precios que contiene [start, end).
+
+        Solo se escribe si ese rango es más largo que el del archivo actual.
+        """
+        symbol = check_symbol(symbol) # Antes de usarlo en el nombre del archivo temporal
+        covered = self.price_cache.covering_range(symbol, start, end)
+        if covered is None:
+            return
+        start, end = covered
+        current = self._remap(symbol)
+        if current is not None and to_day(end) - to_day(start) <= current.end - current.start:
+            return
+        history = self.price_cache.read_closes(symbol, start, end)
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{symbol}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, to_day(start), to_day(end), len(history)))
+                f.write(history.days.tobytes())
+                f.write(history.cents.tobytes())
+                f.write(history.adjusted.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path(symbol))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def stats(self) -> dict:
+        """Símbolos mapeados en este proceso y bytes que ocupan (compartidos con los demás workers)."""
+        mappings = list(self._mappings.values())
+        return {
+            "symbols": len(mappings),
+            "bytes": sum(m.days.nbytes + m.cents.nbytes + m.adjusted.nbytes for m in mappings),
+            "pending": self._queue.qsize(),
+        }
@@ -0,0 +1,65 @@
+"""
+Configuración de la API. Cada valor se puede sobreescribir con una variable de entorno del mismo nombre.
+"""
+
+import os
+
+
+# Ruta del archivo SQLite donde se guardan las barras diarias (OHLCV) descargadas de los proveedores de precios.
+PRICE_CACHE_PATH = os.getenv("PRICE_CACHE_PATH", "prices.sqlite")
+
+# Carpeta de los archivos de cierres mapeados en memoria, compartidos entre los workers.
+CLOSE_STORE_DIR = os.getenv("CLOSE_STORE_DIR", "closes")
+
+# Proveedor de precios: "yfinance" (Yahoo Finance) o "local" (archivos de prueba o serie sintética, sin red).
+PRICE_PROVIDER = os.getenv("PRICE_PROVIDER", "yfinance")
+
+# Carpeta con archivos <SYMBOL>.csv o <SYMBOL>.parquet para el proveedor local.
+PRICE_FIXTURES_DIR = os.getenv("PRICE_FIXTURES_DIR")
+
+# Semilla de la serie sintética del proveedor local.
+PRICE_SEED = int(os.getenv("PRICE_SEED", "0"))
+
+# Máximo de descargas de historial simultáneas (tamaño del pool de hilos dedicado a precios).
+PRICE_FETCH_CONCURRENCY = int(os.getenv("PRICE_FETCH_CONCURRENCY", "16"))
+
+# Tiempo máximo (segundos) para obtener el historial de un símbolo antes de responder 504.
+PRICE_FETCH_TIMEOUT = float(os.getenv("PRICE_FETCH_TIMEOUT", "10"))
+
+# Ruta del archivo SQLite donde se guardan los portafolios de los usuarios.
+PORTFOLIOS_DB_PATH = os.getenv("PORTFOLIOS_DB_PATH", "portfolios.sqlite")
+
+# Hilos dedicados a leer y escribir portafolios (las esperas por el bloqueo de SQLite ocurren ahí, no en el bucle de eventos).
+STORAGE_CONCURRENCY = int(os.getenv("STORAGE_CONCURRENCY", "4"))
+
+# Primera fecha del eje de sesiones del índice de rendimientos (no se calculan rendimientos antes de esta fecha: las rutas de
+# rendimientos responden 400 si la fecha de inicio es anterior).
+RETURN_INDEX_START = os.getenv("RETURN_INDEX_START", "1980-01-01")
+
+# Máximo de respuestas preserializadas por ruta (una por combinación de parámetros) para las rutas de datos constantes.
+STATIC_RESPONSE_CACHE_SIZE = int(os.getenv("STATIC_RESPONSE_CACHE_SIZE", "4096"))
+
+# Caché en memoria de historiales recientes (delante de la caché persistente): máximo de entradas y de bytes.
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "10000"))
+QUOTE_CACHE_MAX_BYTES = int(os.getenv("QUOTE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Segundos de validez en la caché en memoria de un historial que incluye la sesión de hoy (sus precios aún cambian).
+# Los historiales de sesiones cerradas no vencen.
+QUOTE_CACHE_OPEN_TTL = float(os.getenv("QUOTE_CACHE_OPEN_TTL", "30"))
+
+# Máximo de usuarios con rendimientos de portafolio ya calculados guardados en memoria (por proceso).
+PERFORMANCE_CACHE_MAX_USERS = int(os.getenv("PERFORMANCE_CACHE_MAX_USERS", "100000"))
+
+# Importación masiva de portafolios: registros por transacción y máximo de errores detallados en la respuesta.
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+
+# Precarga en segundo plano (al arrancar y después de cada cierre) de los precios de los símbolos de los portafolios:
+# "1" para activarla, "0" para desactivarla; días hacia atrás que se precargan y máximo de símbolos a la vez.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_DAYS = int(os.getenv("PREFETCH_DAYS", "366"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+
+# "1" para mapear al arrancar (en segundo plano) todos los archivos de cierres guardados en CLOSE_STORE_DIR y cargar sus
+# páginas en memoria; así las primeras consultas no leen del disco.
+HYDRATE_ON_STARTUP = os.getenv("HYDRATE_ON_STARTUP", "0") == "1"
@@ -0,0 +1,40 @@
+"""
+Conexiones SQLite compartidas por la caché de precios y el almacén de portafolios.
+"""
+
+import sqlite3
+import threading
+
+
+def connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Abre una conexión SQLite en modo WAL.
+
+    WAL permite que varios procesos (workers de uvicorn) lean mientras otro escribe, y synchronous=NORMAL
+    mantiene la durabilidad del registro de escritura sin esperar a disco en cada transacción.
+    check_same_thread=False solo para conexiones que se usan desde un único hilo a la vez en distintos momentos
+    (por ejemplo, un generador que Starlette va recorriendo desde su pool de hilos).
+    """
+    conn = sqlite3.connect(path, timeout=30, cached_statements=256, check_same_thread=check_same_thread) # Las sentencias preparadas se reutilizan por conexión.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class LocalConnections:
+    """
+    Una conexión reutilizable por hilo: sqlite3 no permite compartir conexiones entre hilos.
+
+    Parámetros:
+    - path: Ruta del archivo SQLite.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
@@ -0,0 +1,69 @@
+"""
+Respuestas preserializadas con ETag y Cache-Control.
+
+Las rutas que devuelven siempre el mismo contenido lo serializan una sola vez y después entregan los bytes
+guardados. Si el cliente ya tiene esa versión (cabecera If-None-Match), se responde 304 sin cuerpo.
+"""
+
+import hashlib
+
+import orjson
+from fastapi import Request, Response
+
+
+class StaticPayload:
+    """
+    Cuerpo JSON ya serializado junto con su ETag.
+
+    Parámetros:
+    - content: Datos a serializar (diccionario, lista, ...).
+    """
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, content):
+        self.body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"' # ETag fuerte: mismo cuerpo, misma etiqueta
+
+
+def key_etag(*parts) -> str:
+    """ETag fuerte calculado a partir de lo que identifica la respuesta (sin tener que generarla)."""
+    return '"' + hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(request: Request, etag: str, exists: bool = False) -> bool:
+    """
+    Indica si el cliente ya tiene la versión etag (If-None-Match, incluidas las etiquetas débiles W/).
+
+    Parámetros:
+    - exists: True si ya se sabe que el recurso existe. Solo entonces "*" cuenta como coincidencia: un ETag calculado
+      con key_etag se conoce antes de saber si hay datos (por ejemplo, precios de un símbolo que no existe).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return (exists and "*" in tags) or etag.removeprefix("W/") in tags
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Respuesta 304 sin cuerpo."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def cached_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Devuelve 304 si el cliente ya tiene la versión etag, o la respuesta completa con sus cabeceras de caché."""
+    if etag_matches(request, etag, exists=True): # El cuerpo ya está generado
+        return not_modified(etag, cache_control)
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def json_response(content, etag: str, cache_control: str) -> Response:
+    """Respuesta JSON (serializada con orjson) con sus cabeceras de caché."""
+    body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def static_response(request: Request, payload: StaticPayload, cache_control: str) -> Response:
+    """Respuesta para un StaticPayload (304 si el cliente ya lo tiene)."""
+    return cached_response(request, payload.body, payload.etag, cache_control)
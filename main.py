@@ -3,30 +3,194 @@ API de ejemplo para manejo de activos financieros. Este código define una API w
 """
 
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 from datetime import datetime, timedelta
-import yfinance as yf
-import uvicorn
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from contextlib import asynccontextmanager
+import asyncio
+import numpy as np
+
+import config
+from price_cache import PriceCache
+from close_store import CloseStore
+from providers import create_provider
+from singleflight import SingleFlight
+from storage import PortfolioStore
+from symbols import Symbol
+from timeseries import day_numbers, nearest_indexer
+from trading_calendar import get_calendar
+from returns_index import ReturnIndex
+from portfolio_engine import WeightMatrix, cumulative_returns, portfolio_returns
+from streaming import MEDIA_TYPES, arrow_chunks, csv_chunks, ndjson_chunks
+from responses import FastJSONResponse
+from memory_cache import MemoryCache
+from prefetch import PrefetchRounds, PrefetchScheduler
+from performance_cache import PerformanceCache, PerformanceEntry
+from bulk import PARSERS, ndjson_export
+from http_cache import StaticPayload, etag_matches, json_response, key_etag, not_modified, static_response
+
+
+# Proveedor de datos de mercado (Yahoo Finance o datos locales, según config.PRICE_PROVIDER).
+price_provider = create_provider(config.PRICE_PROVIDER, config.PRICE_FIXTURES_DIR, config.PRICE_SEED)
+
+# Calendario bursátil con el que se eligen las fechas a descargar (NYSE; NASDAQ cierra los mismos días).
+market_calendar = get_calendar("NYSE")
+
+# Caché persistente de precios: las barras ya descargadas se leen desde disco y solo se pide al proveedor lo que falta.
+# Se usa la fecha de la bolsa, no la del servidor: la sesión en curso nunca se marca como descargada, y la de hoy sí
+# a partir de la hora en que su cierre es definitivo.
+price_cache = PriceCache(config.PRICE_CACHE_PATH, fetch=price_provider.history, settled_end=market_calendar.settled_end)
+
+# Cierres de sesiones cerradas en archivos mapeados en memoria: todos los workers leen las mismas páginas sin copiarlas.
+close_store = CloseStore(config.CLOSE_STORE_DIR, price_cache)
+
+# Cierres de cada símbolo alineados al eje de sesiones: el rendimiento de un período son dos lecturas de array.
+return_index = ReturnIndex(market_calendar, datetime.strptime(config.RETURN_INDEX_START, "%Y-%m-%d").date())
+
+# Pool de hilos acotado para las descargas de historial (config.PRICE_FETCH_CONCURRENCY descargas a la vez como máximo).
+# Todo el trabajo bloqueante (yfinance, pandas, SQLite de precios) corre aquí y no en el pool por defecto de Starlette,
+# así las rutas que solo leen portafolios en memoria nunca esperan detrás de una descarga lenta.
+price_executor = ThreadPoolExecutor(max_workers=config.PRICE_FETCH_CONCURRENCY, thread_name_prefix="prices")
+
+# Pool de hilos para el almacén de portafolios (SQLite). Una escritura de otro worker puede retener el bloqueo de la base
+# varios segundos (por ejemplo, un bloque de /portfolios:bulk): la espera ocurre en estos hilos y no en el bucle de eventos.
+storage_executor = ThreadPoolExecutor(max_workers=config.STORAGE_CONCURRENCY, thread_name_prefix="storage")
+
+# Caché en memoria de historiales ya leídos, por (symbol, start, end): LRU acotada por entradas y bytes.
+quote_cache = MemoryCache(config.QUOTE_CACHE_MAX_ENTRIES, config.QUOTE_CACHE_MAX_BYTES)
+
+# Descargas en curso por (operación, symbol, start, end): las peticiones idénticas simultáneas comparten una sola descarga.
+price_flights = SingleFlight()
+
+# Un turno por hilo del pool de precios: una tarea solo empieza a contar su tiempo máximo cuando tiene un hilo libre.
+price_slots = asyncio.Semaphore(config.PRICE_FETCH_CONCURRENCY)
+
+
+async def run_price_task(func, symbol: str, start, end):
+    """
+    Ejecuta func(symbol, start, end) en el pool de precios, sin bloquear el bucle de eventos.
+    Las peticiones idénticas que llegan mientras hay una en curso esperan su resultado en lugar de repetirla.
+    Si tarda más de config.PRICE_FETCH_TIMEOUT segundos se responde 504; el tiempo cuenta desde que la tarea tiene un
+    hilo libre, no desde que espera turno (así muchos símbolos a la vez no agotan el tiempo de los últimos).
+    """
+    loop = asyncio.get_running_loop()
+    key = (func.__name__, symbol.upper(), start, end)
+
+    async def run():
+        await price_slots.acquire()
+        future = loop.run_in_executor(price_executor, func, symbol, start, end)
+        future.add_done_callback(lambda _: price_slots.release()) # El turno se libera cuando el hilo termina, aunque se haya agotado el tiempo
+        return await asyncio.wait_for(asyncio.shield(future), timeout=config.PRICE_FETCH_TIMEOUT)
+
+    try:
+        return await price_flights.do(key, run)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Tiempo de espera agotado al obtener los precios de {symbol}")
+
 
+async def run_storage(func, *args):
+    """Ejecuta func(*args) (una operación de portfolios_db) en el pool del almacén, sin bloquear el bucle de eventos."""
+    return await asyncio.get_running_loop().run_in_executor(storage_executor, func, *args)
 
-app = FastAPI() # Se crea una instancia de la aplicación FastAPI. Esta instancia se usa para definir rutas y manejar peticiones HTTP.
+
+async def fetch_closes(symbol: str, start, end):
+    """
+    Obtiene los cierres [start, end) de un símbolo (ClosePrices): primero de los archivos compartidos, después de la
+    caché en memoria del proceso y, si no están, de la caché de precios (que descarga lo que falte).
+    """
+    history = close_store.get(symbol, start, end)
+    if history is not None:
+        return history
+    key = (symbol.upper(), start, end)
+    history = quote_cache.get(key)
+    if history is None:
+        history = await run_price_task(price_cache.get_closes, symbol, start, end)
+        close_store.schedule(symbol, start, end) # El escritor amplía el archivo compartido con lo recién descargado
+        # Si el rango llega a la sesión de hoy sus precios aún pueden cambiar: vence pronto. Si no, no vence.
+        ttl = config.QUOTE_CACHE_OPEN_TTL if end > market_calendar.today() else None
+        if not history.empty: # Un resultado vacío no se guarda: se vuelve a consultar la próxima vez
+            quote_cache.put(key, history, size=history.nbytes, ttl=ttl)
+    return history
+
+
+async def load_closes(symbol: str, start, end):
+    """Carga en return_index los cierres de [start, end) del símbolo que todavía no tiene."""
+    needed = return_index.needed_range(symbol, start, end)
+    if needed is not None:
+        history = await fetch_closes(symbol, *needed)
+        return_index.add(symbol, history, *needed)
+
+
+# Precarga de los precios de todos los símbolos de los portafolios, al arrancar y después de cada cierre del mercado
+# (un solo worker descarga cada ronda; los demás leen de la caché compartida).
+prefetch = PrefetchScheduler(
+    market_calendar,
+    symbols=lambda: portfolios_db.symbols(),
+    load=load_closes,
+    rounds=PrefetchRounds(config.PRICE_CACHE_PATH),
+    days=config.PREFETCH_DAYS,
+    concurrency=config.PREFETCH_CONCURRENCY,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranca las tareas en segundo plano al iniciar el servidor y las detiene al apagarlo."""
+    if config.PREFETCH_ENABLED:
+        prefetch.start()
+    if config.HYDRATE_ON_STARTUP:
+        # Se mapean en segundo plano los archivos de cierres ya guardados: el servidor responde mientras tanto.
+        app.state.hydration = asyncio.create_task(asyncio.to_thread(close_store.hydrate))
+    yield
+    await prefetch.stop()
+
+
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan) # Se crea una instancia de la aplicación FastAPI. Esta instancia se usa para definir rutas y manejar peticiones HTTP. Las respuestas se serializan con orjson (ver responses.py).
+
+# Las rutas de esta sección devuelven datos constantes (o que solo cambian una vez al día): se serializan una sola vez
+# y se entregan los bytes guardados con ETag y Cache-Control, así el tráfico de health-checks y sondeos casi no cuesta.
+ROOT_PAYLOAD = StaticPayload({"message": "API de precios de acciones"}) # Se serializa al arrancar
+
+@lru_cache(maxsize=config.STATIC_RESPONSE_CACHE_SIZE) # Caché acotada: una entrada por símbolo
+def stock_payload(symbol: str) -> StaticPayload:
+    return StaticPayload({"symbol": symbol, "price": "120 USD"})
+
+@lru_cache(maxsize=config.STATIC_RESPONSE_CACHE_SIZE) # Una entrada por combinación de parámetros y día (las sesiones cambian con el día)
+def stock_query_payload(symbol: str, exchange: str, today) -> StaticPayload:
+    calendar = get_calendar(exchange)
+    return StaticPayload({
+        "symbol": symbol,
+        "exchange": exchange,
+        "price": "120 USD",
+        "is_trading_day": calendar.is_session(today) if calendar else None, # Si la bolsa abre hoy (null si no hay calendario de esa bolsa)
+        "last_session": calendar.last_session().isoformat() if calendar else None, # Última sesión hasta hoy
+    })
+
+# Cache-Control de las respuestas que nunca cambian (precios de sesiones cerradas)
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Cache-Control de los portafolios: se pueden guardar, pero hay que revalidarlos (If-None-Match) antes de usarlos
+REVALIDATE = "private, no-cache"
 
 # Ruta básica
 @app.get("/") # Define una ruta que responde a solicitudes GET en la raíz (/) del servidor.
-def read_root(): # Función que se ejecuta cuando se accede a /
-    return {"message": "API de precios de acciones"} # Retorna un diccionario convertido automáticamente a JSON para enviarlo como respuesta
+async def read_root(request: Request): # Función que se ejecuta cuando se accede a /
+    return static_response(request, ROOT_PAYLOAD, "public, max-age=3600") # Retorna el JSON ya serializado: {"message": "API de precios de acciones"}
 
 # Ruta con parámetro en la URL (path parameter/parámetro de ruta)
 @app.get("/stocks/{symbol}") # Define una ruta GET que acepta un parámetro dinámico (symbol) en la URL; ejemplo: /stocks/AAPL
-def get_stock(symbol: str): # El parámetro se espera como una cadena (ej. "AAPL", "GOOG").
-    return {"symbol": symbol, "price": "120 USD"} # La función devuelve el símbolo que se pidió, junto con un precio fijo (ficticio en este ejemplo).
+async def get_stock(symbol: Symbol, request: Request): # El parámetro se espera como una cadena (ej. "AAPL", "GOOG"); Symbol solo acepta letras, dígitos y . - ^ = (si no, error 422).
+    return static_response(request, stock_payload(symbol), "public, max-age=3600") # La función devuelve el símbolo que se pidió, junto con un precio fijo (ficticio en este ejemplo).
 
 # Ruta con parámetros de consulta (query parameters/parámetros de consulta)
 @app.get("/stocks/") # Define una ruta GET que espera recibir parámetros de consulta en la URL (lo que va después de ?).
-def get_stock_by_query(symbol: str, exchange: str = "NYSE"): # El parámetro symbol es obligatorio en la consulta; el parámetro exchange es opcional y tiene un valor por defecto ("NYSE").
+async def get_stock_by_query(request: Request, symbol: Symbol, exchange: str = "NYSE"): # El parámetro symbol es obligatorio en la consulta; el parámetro exchange es opcional y tiene un valor por defecto ("NYSE").
 # Ejemplo de uso: /stocks/?symbol=TSLA&exchange=NASDAQ
-    return {"symbol": symbol, "exchange": exchange, "price": "120 USD"} # Devuelve un JSON con el símbolo, la bolsa y un precio (también ficticio).
+    calendar = get_calendar(exchange) or market_calendar # Calendario de sesiones de la bolsa pedida (feriados y fines de semana); las demás bolsas se aceptan sin sesiones
+    return static_response(request, stock_query_payload(symbol, exchange, calendar.today()), "public, max-age=60") # Devuelve un JSON con el símbolo, la bolsa, un precio (también ficticio) y las sesiones de esa bolsa.
 
 
 #########################################################################################################################################
@@ -36,7 +200,7 @@ def get_stock_by_query(symbol: str, exchange: str = "NYSE"): # El parámetro sym
 
 # Definición de la ruta:
 @app.get("/stocks/{symbol}/price") # Define una ruta HTTP GET tipo: /stocks/AAPL/price?date=2022-05-10
-def get_stock_price_on_date(symbol: str, date: str): # Usa un 'path parameter' symbol (ej. "AAPL") y un 'query parameter' date (ej. "2022-05-10").
+async def get_stock_price_on_date(symbol: Symbol, date: str, request: Request): # Usa un 'path parameter' symbol (ej. "AAPL") y un 'query parameter' date (ej. "2022-05-10").
     """
     Obtiene el precio de la acción en una fecha específica o la fecha hábil más cercana.
     Parámetros:
@@ -45,31 +209,48 @@ def get_stock_price_on_date(symbol: str, date: str): # Usa un 'path parameter' s
     
     Retorna:
     - Precio de cierre de la acción en la fecha solicitada o la más cercana disponible.
+    Para fechas cuyas sesiones ya cerraron, la respuesta lleva un ETag fuerte y Cache-Control immutable:
+    si el cliente envía If-None-Match con ese ETag se responde 304 sin consultar precios.
     """
     try:
         # Convertir la fecha a datetime
         date_obj = datetime.strptime(date, "%Y-%m-%d").date() # Convierte la fecha enviada por el usuario (cadena) en un objeto datetime.date.
 
-        # Descargar los datos de la acción
-        stock = yf.Ticker(symbol) # Se usa la librería yfinance para acceder a datos históricos de acciones.
-        history = stock.history(start=date_obj - timedelta(days=3), end=date_obj + timedelta(days=3)) # Se descargan 7 días de historial (±3 días desde la fecha solicitada), para encontrar la fecha más cercana si no hay datos exactos.
+        # Si la sesión siguiente a la fecha ya pasó, el precio de cierre más cercano no puede cambiar: el ETag depende solo de la petición
+        historical = market_calendar.next_session(date_obj) < market_calendar.today()
+        if historical:
+            etag = key_etag("price", config.PRICE_PROVIDER, symbol, date)
+            if etag_matches(request, etag):
+                return not_modified(etag, IMMUTABLE)
+
+        # Obtener los datos de la acción (desde la caché local; solo se descarga de Yahoo lo que falte)
+        # Con el calendario bursátil se sabe qué sesiones rodean la fecha: se piden solo la sesión anterior, la siguiente y la propia fecha (si es sesión), aunque haya feriados largos en medio.
+        history = await fetch_closes(symbol, market_calendar.previous_session(date_obj), market_calendar.next_session(date_obj) + timedelta(days=1))
 
         if history.empty: # Si no se obtienen datos, se lanza un error 404 (no encontrado).
             raise HTTPException(status_code=404, detail=f"No hay datos disponibles para {symbol} en {date}")
 
         # Filtrar los datos por la fecha más cercana si no hay datos exactos. Se devuelve un JSON.
-        closest_date = min(history.index, key=lambda d: abs(d.date() - date_obj)) # history.index contiene fechas de los datos descargados. Se elige la fecha cuya diferencia con date_obj sea la menor.
-        closing_price = history.loc[closest_date]['Close'] # Se accede al precio de cierre ("Close") en la fecha más cercana.
-        return {
+        position = nearest_indexer(history.days, [date_obj])[0] # history.days contiene las fechas de los datos descargados. Se elige la fecha cuya diferencia con date_obj sea la menor (búsqueda binaria sobre las fechas ordenadas).
+        closest_date = history.date(position)
+        closing_price = history.price(position) # Se accede al precio de cierre en la fecha más cercana (guardado en centavos, ya redondeado).
+        result = {
             "symbol": symbol,
             "requested_date": date,
-            "closest_date": closest_date.date().isoformat(),
-            "closing_price": round(closing_price, 2)
+            "closest_date": closest_date.isoformat(),
+            "closing_price": closing_price
         }
+        if historical:
+            return json_response(result, etag, IMMUTABLE) # El cliente o la CDN pueden guardarlo para siempre
+        return result
 
     except ValueError:
         # Manejar error si el formato de la fecha no es válido
         raise HTTPException(status_code=400, detail="El formato de la fecha debe ser YYYY-MM-DD")
+
+    except HTTPException:
+        # Los errores HTTP ya preparados (404, 504) se devuelven tal cual
+        raise
     
     except Exception as e:
         # Manejar cualquier otro error
@@ -89,6 +270,143 @@ Ejemplo de respuesta en JSON:
     
 #########################################################################################################################################
 
+# Método HTTP - GET (historial completo):
+
+@app.get("/stocks/{symbol}/history") # Define una ruta HTTP GET tipo: /stocks/AAPL/history?start=2020-01-01&end=2021-01-01&format=csv
+async def get_stock_history(symbol: Symbol, start: str, end: str, format: str = "ndjson"):
+    """
+    Descarga el historial diario (OHLCV) de una acción en un rango de fechas.
+    La respuesta se envía por partes directamente desde la caché local, así la memoria usada es la misma
+    sin importar lo largo que sea el rango.
+
+    Parámetros:
+    - symbol: El símbolo de la acción (ejemplo: AAPL)
+    - start: Fecha de inicio (incluida) en formato YYYY-MM-DD
+    - end: Fecha de fin (excluida) en formato YYYY-MM-DD
+    - format: "ndjson" (un objeto JSON por línea), "csv" o "arrow" (Arrow IPC stream, requiere pyarrow)
+
+    Retorna:
+    Una fila por sesión con fecha, apertura, máximo, mínimo, cierre, volumen, dividendos y splits (precios sin ajustar),
+    y el cierre ajustado por splits y dividendos.
+    """
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="El formato debe ser ndjson, csv o arrow")
+    try:
+        start_obj = datetime.strptime(start, "%Y-%m-%d").date()
+        end_obj = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="El formato de la fecha debe ser YYYY-MM-DD")
+    if format == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="El formato arrow no está disponible (falta pyarrow)")
+
+    # Primero se descarga lo que falte en la caché; después se lee desde disco por bloques
+    await run_price_task(price_cache.ensure, symbol, start_obj, end_obj)
+
+    batches = price_cache.iter_bars(symbol, start_obj, end_obj)
+    chunks = {"ndjson": ndjson_chunks, "csv": csv_chunks, "arrow": arrow_chunks}[format](batches)
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format])
+
+#########################################################################################################################################
+
+# Estadísticas de la caché en memoria de precios:
+
+@app.get("/cache/stats") # Define una ruta HTTP GET: /cache/stats
+async def get_cache_stats():
+    """
+    Retorna:
+    Aciertos, fallos, desalojos y ocupación de la caché en memoria de historiales de precios (por proceso),
+    símbolos mapeados de los archivos de cierres compartidos, estado de la última precarga y aciertos de la caché de
+    rendimientos de portafolio.
+    """
+    return {
+        "quotes": quote_cache.stats(),
+        "closes": close_store.stats(),
+        "prefetch": {"last_run": prefetch.last_run, "errors": prefetch.last_errors},
+        "performance": performance_cache.stats(),
+    }
+
+#########################################################################################################################################
+
+# Método HTTP - POST (consulta de precios en lote):
+
+class PriceQuery(BaseModel):
+    symbol: Symbol # Símbolo de la acción (ej: AAPL)
+    date: str # Fecha en formato YYYY-MM-DD
+
+class PriceBatch(BaseModel):
+    items: list[PriceQuery] # Lista de pares (símbolo, fecha) a consultar
+
+@app.post("/stocks/prices:batch") # Define una ruta HTTP POST: /stocks/prices:batch, con un cuerpo JSON {"items": [{"symbol": "AAPL", "date": "2022-05-10"}, ...]}
+async def get_stock_prices_batch(batch: PriceBatch):
+    """
+    Obtiene los precios de cierre de muchos pares (símbolo, fecha) en una sola petición.
+    Las consultas se agrupan por símbolo: se obtiene una sola vez el rango de fechas que cubre todas las fechas pedidas
+    de ese símbolo y luego se busca el día hábil más cercano para cada una.
+
+    Parámetros:
+    - batch: Lista de pares (símbolo, fecha).
+
+    Retorna:
+    Una lista de resultados en el mismo orden que la petición. Cada resultado tiene el mismo formato que
+    /stocks/{symbol}/price, o un campo "error" si esa consulta no se pudo resolver.
+    """
+    results = [None] * len(batch.items)
+
+    # Agrupar las consultas por símbolo: símbolo -> lista de (posición en la petición, fecha)
+    by_symbol = {}
+    for position, item in enumerate(batch.items):
+        try:
+            date_obj = datetime.strptime(item.date, "%Y-%m-%d").date()
+        except ValueError:
+            results[position] = {"symbol": item.symbol, "requested_date": item.date, "error": "El formato de la fecha debe ser YYYY-MM-DD"}
+            continue
+        by_symbol.setdefault(item.symbol, []).append((position, date_obj))
+
+    # Un solo rango por símbolo (desde la sesión anterior a la primera fecha hasta la sesión siguiente a la última), todos los símbolos a la vez
+    symbols = list(by_symbol)
+    histories = await asyncio.gather(
+        *(
+            fetch_closes(
+                symbol,
+                market_calendar.previous_session(min(d for _, d in by_symbol[symbol])),
+                market_calendar.next_session(max(d for _, d in by_symbol[symbol])) + timedelta(days=1),
+            )
+            for symbol in symbols
+        ),
+        return_exceptions=True, # Un símbolo que falla no hace fallar al resto de la petición.
+    )
+
+    for symbol, history in zip(symbols, histories):
+        queries = by_symbol[symbol]
+        if isinstance(history, Exception):
+            error = history.detail if isinstance(history, HTTPException) else str(history)
+            for position, _ in queries:
+                results[position] = {"symbol": symbol, "requested_date": batch.items[position].date, "error": error}
+            continue
+
+        # Todas las fechas del símbolo se resuelven juntas, en una sola pasada de NumPy
+        requested = np.array([date_obj for _, date_obj in queries], dtype="datetime64[D]")
+        nearest = nearest_indexer(history.days, requested)
+        # Igual que en /stocks/{symbol}/price: solo vale una fecha entre la sesión anterior y la siguiente a la pedida
+        window_start = day_numbers(market_calendar.previous_sessions(requested))
+        window_end = day_numbers(market_calendar.next_sessions(requested))
+
+        for (position, _), index, low, high in zip(queries, nearest, window_start, window_end):
+            result = {"symbol": symbol, "requested_date": batch.items[position].date}
+            if index < 0 or not low <= history.days[index] <= high:
+                result["error"] = f"No hay datos disponibles para {symbol} en {result['requested_date']}"
+            else:
+                result["closest_date"] = history.date(index).isoformat()
+                result["closing_price"] = history.price(index)
+            results[position] = result
+
+    return {"results": results}
+
+#########################################################################################################################################
+
 """
 Comentario sobre Pydantic:
 
@@ -104,15 +422,74 @@ Permite tener un control total sobre los datos que recibimos y que enviamos en l
 
 # Método HTTP - POST:
 
-# Diccionario para almacenar los portafolios de los usuarios
-portfolios_db = {} # Es una estructura en memoria (diccionario de Python) que simula una base de datos. La clave es el user_id y el valor será un diccionario con las acciones y sus ponderaciones (porcentaje del portafolio).
+# Almacén para los portafolios de los usuarios
+portfolios_db = PortfolioStore(config.PORTFOLIOS_DB_PATH) # Base de datos SQLite (modo WAL) que se usa como un diccionario: la clave es el user_id y el valor es un diccionario con las acciones y sus ponderaciones (porcentaje del portafolio). Sobrevive a los reinicios y la comparten todos los workers.
+
+performance_cache = PerformanceCache(config.PERFORMANCE_CACHE_MAX_USERS) # Rendimientos ya calculados por usuario y período, válidos mientras no cambien el portafolio ni los precios de sus acciones.
 
 # Modelo de datos Pydantic para el portafolio (para la validación de las entradas de datos que realice el usuario)
 class Portfolio(BaseModel):
-    stocks: dict[str, float] # portfolio.stocks es un diccionario donde: clave = símbolo de la acción (ej: AAPL), valor = porcentaje del portafolio asignado a esa acción (ej: 40.0)
+    stocks: dict[Symbol, float] # portfolio.stocks es un diccionario donde: clave = símbolo de la acción (ej: AAPL), valor = porcentaje del portafolio asignado a esa acción (ej: 40.0)
+
+# Un registro de la importación masiva: {"user_id": "u1", "stocks": {"AAPL": 60, "MSFT": 40}}
+class PortfolioRecord(Portfolio):
+    user_id: str
+
+# Cambios parciales de un portafolio: {"set": {"AAPL": 30.0}, "remove": ["TSLA"]}
+class PortfolioPatch(BaseModel):
+    set: dict[Symbol, float] = {} # Acciones que se añaden o cuya ponderación cambia
+    remove: list[Symbol] = [] # Acciones que se quitan del portafolio
+
+# Rendimiento de muchos portafolios en una sola petición (para procesos de riesgo)
+class BatchPerformanceRequest(BaseModel):
+    start_date: str # Fecha de inicio en formato YYYY-MM-DD
+    end_date: str # Fecha de fin en formato YYYY-MM-DD
+    user_ids: list[str] | None = None # Usuarios a calcular; si no se indica, se calculan todos los portafolios guardados
+
+@app.post("/portfolios/performance:batch") # Se declara antes que POST /portfolios/{user_id}; si no, "performance:batch" se tomaría como un user_id.
+async def get_portfolios_performance_batch(request: BatchPerformanceRequest):
+    """
+    Calcula el rendimiento de muchos portafolios en el mismo período.
+    Los portafolios se convierten en una matriz dispersa de ponderaciones (usuarios x símbolos) que se multiplica
+    por el vector de rendimientos de los símbolos en una sola operación.
+
+    Parámetros:
+    - request: Fechas de inicio y fin, y opcionalmente la lista de usuarios.
+
+    Retorna:
+    El rendimiento total (en %) de cada usuario (null si a alguna de sus acciones le faltan datos en el período),
+    y la lista de usuarios pedidos que no tienen portafolio.
+    """
+    try:
+        start = datetime.strptime(request.start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(request.end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido, debe ser YYYY-MM-DD")
+    if start < return_index.start: # El índice de cierres no tiene sesiones antes de RETURN_INDEX_START
+        raise HTTPException(status_code=400, detail=f"La fecha de inicio no puede ser anterior a {return_index.start.isoformat()}")
+
+    def build_weights():
+        if request.user_ids is None:
+            return WeightMatrix.from_portfolios(portfolios_db.items()), []
+        found = portfolios_db.get_many(request.user_ids)
+        return WeightMatrix.from_portfolios(found.items()), [user_id for user_id in request.user_ids if user_id not in found]
+
+    # Leer los portafolios y armar la matriz puede tardar con muchos usuarios: se hace fuera del bucle de eventos
+    weights, not_found = await run_storage(build_weights)
+
+    # Cargar los cierres de todos los símbolos (run_price_task limita cuántos se descargan a la vez)
+    await asyncio.gather(*(load_closes(symbol, start, end) for symbol in weights.symbols), return_exceptions=True) # Un símbolo que falla deja en null solo a los usuarios que lo tienen
+
+    total_returns = await asyncio.to_thread(portfolio_returns, return_index, weights, start, end) # Fuera del pool de precios: sus hilos quedan solo para descargas
+    return {
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "total_returns": total_returns,
+        "not_found": not_found,
+    }
 
 @app.post("/portfolios/{user_id}") # Define una ruta HTTP POST: /portfolios/{user_id}
-def save_portfolio(user_id: str, portfolio: Portfolio): # user_id: parámetro de ruta (por ejemplo, "user123"); portfolio: objeto enviado en el cuerpo de la petición (JSON), validado con el modelo Portfolio.
+async def save_portfolio(user_id: str, portfolio: Portfolio): # user_id: parámetro de ruta (por ejemplo, "user123"); portfolio: objeto enviado en el cuerpo de la petición (JSON), validado con el modelo Portfolio.
     """
     Guarda el portafolio de un usuario.
 
@@ -124,7 +501,7 @@ def save_portfolio(user_id: str, portfolio: Portfolio): # user_id: parámetro de
     Un mensaje de confirmación.
     """
     # Verificamos si el usuario ya tiene un portafolio guardado
-    if user_id in portfolios_db:
+    if await run_storage(portfolios_db.__contains__, user_id):
         raise HTTPException(status_code=400, detail=f"El usuario {user_id} ya tiene un portafolio guardado") # error 400 Bad Request
 
     # Verificamos que las ponderaciones sumen 100%
@@ -133,16 +510,85 @@ def save_portfolio(user_id: str, portfolio: Portfolio): # user_id: parámetro de
         raise HTTPException(status_code=400, detail="Las ponderaciones deben sumar 100%") # Si no suman exactamente 100, error 400
 
     # Guardar el portafolio del usuario
-    portfolios_db[user_id] = portfolio.stocks # Si las validaciones pasan, se guarda el portafolio en el diccionario portfolios_db.
+    if not await run_storage(portfolios_db.insert, user_id, portfolio.stocks): # Si las validaciones pasan, se guarda el portafolio. insert es atómico: si otro worker lo creó entretanto, no se sobrescribe.
+        raise HTTPException(status_code=400, detail=f"El usuario {user_id} ya tiene un portafolio guardado")
     
     return {"message": f"Portafolio guardado para el usuario {user_id}"}
 
 #########################################################################################################################################
 
+# Importación y exportación masiva de portafolios:
+
+@app.post("/portfolios:bulk") # Define una ruta HTTP POST: /portfolios:bulk?format=ndjson (o csv), con los portafolios en el cuerpo
+async def import_portfolios(request: Request, format: str = "ndjson"):
+    """
+    Guarda muchos portafolios en una sola petición. El cuerpo se lee por partes a medida que llega y los portafolios
+    se guardan en transacciones de config.BULK_BATCH_SIZE registros.
+    Parámetros:
+    - format: "ndjson" (un objeto {"user_id", "stocks"} por línea) o "csv" (cabecera user_id,symbol,weight y una fila por acción).
+
+    Retorna:
+    Cuántos portafolios se guardaron, cuántos fallaron y, para los primeros config.BULK_MAX_ERRORS, la línea y el motivo.
+    Cada registro se valida como en POST /portfolios/{user_id}: un registro inválido no impide guardar los demás.
+    """
+    if format not in PARSERS:
+        raise HTTPException(status_code=400, detail="El formato debe ser ndjson o csv")
+
+    inserted, failed, errors = 0, 0, []
+    batch, batch_lines = [], []
+
+    def fail(line: int, user_id, detail: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < config.BULK_MAX_ERRORS:
+            errors.append({"line": line, "user_id": user_id, "detail": detail})
+
+    async def flush():
+        nonlocal inserted
+        rejected = await run_storage(portfolios_db.insert_many, batch) # Una transacción por bloque, fuera del bucle de eventos
+        for position in rejected:
+            fail(batch_lines[position], batch[position][0], f"El usuario {batch[position][0]} ya tiene un portafolio guardado")
+        inserted += len(batch) - len(rejected)
+        batch.clear()
+        batch_lines.clear()
+
+    async for line, record, error in PARSERS[format](request.stream()):
+        if record is None:
+            fail(line, None, error)
+            continue
+        try:
+            portfolio = PortfolioRecord.model_validate(record)
+        except ValidationError as e:
+            first = e.errors()[0]
+            fail(line, record.get("user_id"), f"{'.'.join(map(str, first['loc']))}: {first['msg']}")
+            continue
+        if sum(portfolio.stocks.values()) != 100:
+            fail(line, portfolio.user_id, "Las ponderaciones deben sumar 100%")
+            continue
+        batch.append((portfolio.user_id, portfolio.stocks))
+        batch_lines.append(line)
+        if len(batch) >= config.BULK_BATCH_SIZE:
+            await flush()
+    await flush()
+
+    errors.sort(key=lambda error: error["line"]) # Los usuarios repetidos se detectan al guardar cada bloque
+    return {"inserted": inserted, "failed": failed, "errors": errors}
+
+
+@app.get("/portfolios:export") # Define una ruta HTTP GET: /portfolios:export
+async def export_portfolios():
+    """
+    Retorna:
+    Todos los portafolios guardados en NDJSON (un objeto {"user_id", "stocks"} por línea), enviados por partes.
+    """
+    return StreamingResponse(ndjson_export(portfolios_db.iter_rows()), media_type=MEDIA_TYPES["ndjson"])
+
+#########################################################################################################################################
+
 # Método HTTP - PUT:
 
 @app.put("/portfolios/{user_id}") # define una ruta HTTP PUT, que se usa para actualizar recursos existentes. {user_id} es un path parameter que representa el identificador del usuario.
-def update_portfolio(user_id: str, portfolio: Portfolio): # La función recibe: el ID del usuario, un objeto JSON enviado en el cuerpo de la solicitud, validado con el modelo Portfolio.
+async def update_portfolio(user_id: str, portfolio: Portfolio): # La función recibe: el ID del usuario, un objeto JSON enviado en el cuerpo de la solicitud, validado con el modelo Portfolio.
     """
     Actualiza el portafolio previamente guardado de un usuario.
     Parámetros:
@@ -153,7 +599,7 @@ def update_portfolio(user_id: str, portfolio: Portfolio): # La función recibe:
     Un mensaje de confirmación.
     """
     # Verificamos si el usuario ya tiene un portafolio guardado
-    if user_id not in portfolios_db:
+    if not await run_storage(portfolios_db.__contains__, user_id):
         raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
 
     # Verificamos que las ponderaciones sumen 100%
@@ -162,16 +608,71 @@ def update_portfolio(user_id: str, portfolio: Portfolio): # La función recibe:
         raise HTTPException(status_code=400, detail="Las ponderaciones deben sumar 100%")
 
     # Actualizo el portafolio del usuario
-    portfolios_db[user_id] = portfolio.stocks # Sobrescribe el portafolio actual del usuario con el nuevo.
+    if not await run_storage(portfolios_db.update, user_id, portfolio.stocks): # Sobrescribe el portafolio actual del usuario con el nuevo (falla si otro worker lo eliminó entretanto).
+        raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
+    performance_cache.invalidate(user_id) # Los rendimientos calculados con el portafolio anterior ya no sirven
     return {"message": f"Portafolio actualizado para el usuario {user_id}"}
 
 ########################################################################################################################################
 
+# Método HTTP - PATCH:
+
+def cached_return(symbol: str, start, end):
+    """Rendimiento y versión de precios de un símbolo, solo si sus cierres del período ya están en el índice (si no, None)."""
+    if return_index.needed_range(symbol, start, end) is not None:
+        return None
+    value = return_index.returns([symbol], start, end)[0]
+    return None if np.isnan(value) else (value, return_index.versions([symbol])[0])
+
+@app.patch("/portfolios/{user_id}") # Define una ruta HTTP PATCH, que se usa para modificar solo una parte de un recurso existente.
+async def patch_portfolio(user_id: str, patch: PortfolioPatch):
+    """
+    Modifica solo algunas acciones del portafolio de un usuario, sin reenviarlo completo.
+    Parámetros:
+    - user_id: ID único del usuario.
+    - patch: Acciones a añadir o reponderar (set) y a quitar (remove).
+
+    Retorna:
+    Un mensaje de confirmación y el portafolio resultante.
+    Los rendimientos ya calculados del usuario se ajustan con la diferencia de ponderaciones en lugar de recalcularse.
+    """
+    if len(set(patch.remove)) != len(patch.remove):
+        raise HTTPException(status_code=400, detail="Una acción no puede aparecer más de una vez en remove")
+    both = patch.set.keys() & set(patch.remove)
+    if both:
+        raise HTTPException(status_code=400, detail=f"La acción {min(both)} no puede estar en set y en remove a la vez")
+
+    def change(stocks: dict[str, float]) -> dict[str, float]:
+        for stock in patch.remove:
+            if stock not in stocks:
+                raise HTTPException(status_code=400, detail=f"La acción {stock} no está en el portafolio")
+
+        for stock in patch.remove:
+            del stocks[stock]
+        stocks.update(patch.set)
+
+        # Misma regla que POST y PUT: el portafolio resultante debe sumar exactamente 100%
+        if sum(stocks.values()) != 100:
+            raise HTTPException(status_code=400, detail="Las ponderaciones deben sumar 100%")
+        return stocks
+
+    # Leer, modificar y guardar en una sola transacción (otro worker no puede escribir entretanto)
+    modified = await run_storage(portfolios_db.modify, user_id, change)
+    if modified is None:
+        raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
+    old_stocks, old_version, new_stocks, version = modified
+
+    # Ajustar los rendimientos ya calculados: solo cambian las acciones modificadas
+    performance_cache.rebase(user_id, old_version, version, old_stocks, new_stocks, lookup=cached_return)
+    return {"message": f"Portafolio actualizado para el usuario {user_id}", "portfolio": new_stocks}
+
+########################################################################################################################################
+
 # Método HTTP - DELETE:
 
 # Definición de la ruta:
 @app.delete("/portfolios/{user_id}") # define una ruta HTTP de tipo DELETE, usada para eliminar recursos. {user_id} es un path parameter que identifica al usuario cuyo portafolio se quiere eliminar.
-def delete_portfolio(user_id: str): # la función espera que se le pase el ID del usuario como texto.
+async def delete_portfolio(user_id: str): # la función espera que se le pase el ID del usuario como texto.
     """
     Elimina el portafolio de un usuario si existe. Si no existe, devuelve un error.
 
@@ -181,12 +682,10 @@ def delete_portfolio(user_id: str): # la función espera que se le pase el ID de
     Retorna:
     Un mensaje de confirmación.
     """
-    # Validación:
-    if user_id not in portfolios_db: # Antes de intentar eliminar el portafolio, verifica si existe en portfolios_db.
+    # Eliminación del portafolio del usuario, con validación:
+    if not await run_storage(portfolios_db.delete, user_id): # Elimina el portafolio en una sola operación; si no existía en portfolios_db, devuelve False.
         raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
-
-    # Eliminación el portafolio del usuario
-    del portfolios_db[user_id] # Si pasa la validación, se elimina el portafolio del diccionario portfolios_db usando la palabra clave del.
+    performance_cache.invalidate(user_id)
     
     return {"message": f"Portafolio eliminado para el usuario {user_id}"}
 
@@ -195,24 +694,34 @@ def delete_portfolio(user_id: str): # la función espera que se le pase el ID de
     # Método HTTP - GET:
     # Dos Endpoints con método GET, uno para verificar cartera, otro calcula el rendimiento del portafolio dado el user_id y las fechas de inicio y fin
 
+def portfolio_etag(version: int) -> str:
+    return f'"portfolio-{version}"' # Las versiones son únicas en todo el almacén: cada escritura genera un ETag nuevo
+
 @app.get("/portfolios/{user_id}")
-def get_portfolio(user_id: str):
+async def get_portfolio(user_id: str, request: Request):
     """
     Obtiene el portafolio de un usuario.
     Parámetros:
     - user_id: ID único del usuario.
 
     Retorna:
-    El portafolio del usuario.
+    El portafolio del usuario, con un ETag que cambia con cada modificación (304 si el cliente ya tiene esa versión).
     """
-    if user_id not in portfolios_db:
+    if request.headers.get("if-none-match"):
+        version = await run_storage(portfolios_db.version, user_id) # Solo se lee el número de versión, no el portafolio
+        if version is not None and etag_matches(request, portfolio_etag(version), exists=True): # Con versión, el portafolio existe
+            return not_modified(portfolio_etag(version), REVALIDATE)
+
+    entry = await run_storage(portfolios_db.get_with_version, user_id) # Una sola consulta al almacén
+    if entry is None:
         raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
 
-    return {"user_id": user_id, "portfolio": portfolios_db[user_id]}
+    portfolio, version = entry
+    return json_response({"user_id": user_id, "portfolio": portfolio}, portfolio_etag(version), REVALIDATE) # Se devuelve la respuesta ya armada: evita el paso por jsonable_encoder en una ruta muy consultada
 
 
 @app.get("/portfolios/{user_id}/performance")
-def get_portfolio_performance(user_id: str, start_date: str, end_date: str):
+async def get_portfolio_performance(user_id: str, start_date: str, end_date: str, request: Request):
     """
     Calcula el rendimiento del portafolio de un usuario en un período de tiempo.
     Parámetros:
@@ -221,45 +730,130 @@ def get_portfolio_performance(user_id: str, start_date: str, end_date: str):
     - end_date: Fecha de fin en formato YYYY-MM-DD.
 
     Retorna:
-    El rendimiento total del portafolio en el período de tiempo seleccionado
+    El rendimiento total del portafolio en el período de tiempo seleccionado.
+    Si el período ya cerró, la respuesta lleva un ETag ligado a la versión del portafolio (304 si el cliente ya la tiene).
+    El resultado se guarda en performance_cache: una consulta repetida no vuelve a calcularlo mientras no cambien el
+    portafolio ni los precios de sus acciones.
     """
     # Verificar si el usuario tiene un portafolio guardado
-    if user_id not in portfolios_db:
+    entry = await run_storage(portfolios_db.get_with_version, user_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
-
-    portfolio = portfolios_db[user_id]
+    portfolio, version = entry
 
     # Validamos el formato de las fechas
     try:
-        datetime.strptime(start_date, "%Y-%m-%d")
-        datetime.strptime(end_date, "%Y-%m-%d")
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido, debe ser YYYY-MM-DD")
+    if start < return_index.start: # El índice de cierres no tiene sesiones antes de RETURN_INDEX_START
+        raise HTTPException(status_code=400, detail=f"La fecha de inicio no puede ser anterior a {return_index.start.isoformat()}")
+
+    # Con el período cerrado (fin anterior a hoy), el resultado solo cambia si cambia el portafolio
+    etag = None
+    closed = end <= market_calendar.today()
+    if closed:
+        etag = key_etag("performance", config.PRICE_PROVIDER, version, start_date, end_date)
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE)
+
+    # Resultado ya calculado para esta versión del portafolio. Con el período cerrado sus precios no cambian y se usa tal cual.
+    entry = performance_cache.get(user_id, version, start, end)
+    if entry is None or not closed:
+        # Cargar los precios históricos que falten en el índice (todas las acciones a la vez; la latencia depende del símbolo más lento, no de la suma)
+        stocks = list(portfolio)
+        await asyncio.gather(*(load_closes(stock, start, end) for stock in stocks))
+
+        # Con el período abierto, el resultado guardado vale solo si no llegaron precios nuevos de sus acciones
+        price_versions = return_index.versions(stocks)
+        if entry is None or not np.array_equal(entry.price_versions, price_versions):
+            # Calcular el rendimiento de cada acción: (precio final - precio inicial) / precio inicial, leído del índice
+            stock_returns = return_index.returns(stocks, start, end)
+
+            missing = np.isnan(stock_returns)
+            if missing.any():
+                raise HTTPException(status_code=404, detail=f"No hay datos disponibles para la acción {stocks[missing.argmax()]} en el período seleccionado")
+
+            # Ponderar el rendimiento por la ponderación en el portafolio (producto escalar con el vector de pesos)
+            weights = np.array([portfolio[stock] for stock in stocks]) / 100
+            entry = PerformanceEntry(version, stocks, stock_returns, price_versions, float(stock_returns @ weights))
+            performance_cache.put(user_id, start, end, entry)
 
-    # Obtener los precios históricos de las acciones
-    total_return = 0
-    for stock, weight in portfolio.items():
-        ticker = yf.Ticker(stock)
-        history = ticker.history(start=start_date, end=end_date)
+    # Pasamos a porcentaje
+    total_return = round(entry.total * 100, 2)
 
-        if history.empty:
-            raise HTTPException(status_code=404, detail=f"No hay datos disponibles para la acción {stock} en el período seleccionado")
+    result = {
+        "user_id": user_id,
+        "total_return": total_return,
+        "start_date": start_date,
+        "end_date": end_date
+    }
+    return json_response(result, etag, REVALIDATE) if etag else result
 
-        # Calcular el rendimiento de la acción
-        initial_price = history['Close'].iloc[0]
-        final_price = history['Close'].iloc[-1]
-        stock_return = (final_price - initial_price) / initial_price
 
-        # Ponderar el rendimiento por la ponderación en el portafolio
-        weighted_return = stock_return * (weight / 100)
-        total_return += weighted_return
+@app.get("/portfolios/{user_id}/performance/series")
+async def get_portfolio_performance_series(user_id: str, start_date: str, end_date: str, format: str = "json"):
+    """
+    Calcula la curva diaria del rendimiento acumulado del portafolio de un usuario.
+    Una sola petición reemplaza a cientos de llamadas a /performance con distintas fechas de fin: la curva se calcula
+    en una sola pasada sobre la matriz de cierres alineados.
+    Parámetros:
+    - user_id: ID único del usuario.
+    - start_date: Fecha de inicio en formato YYYY-MM-DD.
+    - end_date: Fecha de fin en formato YYYY-MM-DD.
+    - format: "json" (columnas de fechas y rendimientos) o "arrow" (Arrow IPC stream, requiere pyarrow).
 
-    # Pasamos a porcentaje
-    total_return = round(total_return * 100, 2)
+    Retorna:
+    Las sesiones del período y el rendimiento acumulado (en %) del portafolio al cierre de cada una.
+    """
+    if format not in ("json", "arrow"):
+        raise HTTPException(status_code=400, detail="El formato debe ser json o arrow")
+
+    portfolio = await run_storage(portfolios_db.get, user_id)
+    if portfolio is None:
+        raise HTTPException(status_code=404, detail="Portafolio no encontrado para este usuario")
+
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido, debe ser YYYY-MM-DD")
+    if start < return_index.start: # El índice de cierres no tiene sesiones antes de RETURN_INDEX_START
+        raise HTTPException(status_code=400, detail=f"La fecha de inicio no puede ser anterior a {return_index.start.isoformat()}")
+
+    stocks = list(portfolio)
+    await asyncio.gather(*(load_closes(stock, start, end) for stock in stocks))
+
+    # Matriz de cierres (acciones x sesiones) alineados al mismo eje de fechas
+    days, closes = return_index.closes(stocks, start, end)
+    has_data = ~np.isnan(closes)
+    missing = ~has_data.any(axis=1)
+    if missing.any():
+        raise HTTPException(status_code=404, detail=f"No hay datos disponibles para la acción {stocks[missing.argmax()]} en el período seleccionado")
+
+    # Solo las sesiones entre el primer y el último día con algún cierre (se descartan, por ejemplo, días futuros)
+    traded = np.flatnonzero(has_data.any(axis=0))
+    days, closes = days[traded[0]:traded[-1] + 1], closes[:, traded[0]:traded[-1] + 1]
+
+    weights = np.array([portfolio[stock] for stock in stocks]) / 100
+    curve = np.round(cumulative_returns(closes, weights) * 100, 2) # Pasamos a porcentaje
+
+    if format == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise HTTPException(status_code=400, detail="El formato arrow no está disponible (falta pyarrow)")
+        table = pa.table({"date": days, "cumulative_return": curve})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), media_type="application/vnd.apache.arrow.stream")
 
     return {
         "user_id": user_id,
-        "total_return": total_return,
         "start_date": start_date,
-        "end_date": end_date
-    }
\ No newline at end of file
+        "end_date": end_date,
+        "dates": days.astype(str).tolist(),
+        "cumulative_returns": curve.tolist(),
+    }
@@ -0,0 +1,98 @@
+"""
+Caché en memoria, acotada, con expiración (TTL) y desalojo LRU.
+
+Se usa delante de la caché persistente de precios para las consultas repetidas de símbolos muy pedidos:
+una lectura que acierta aquí no pasa por el pool de hilos ni por SQLite.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """
+    Diccionario LRU con límite de entradas y de bytes, y expiración opcional por entrada.
+
+    Es seguro entre hilos (un Lock protege cada operación) y desde asyncio (ninguna operación espera ni cede
+    el control mientras tiene el Lock).
+
+    Parámetros:
+    - max_entries: Máximo de entradas guardadas.
+    - max_bytes: Máximo de bytes (según el tamaño que se indica en put).
+    - clock: Reloj en segundos (se puede reemplazar en pruebas).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict() # clave -> (valor, vence, tamaño); el más usado al final
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Devuelve el valor guardado, o None si no está o ya venció."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires, size = entry
+            if expires is not None and expires <= self.clock():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size: int, ttl: float | None = None):
+        """
+        Guarda un valor.
+
+        Parámetros:
+        - size: Tamaño aproximado del valor en bytes.
+        - ttl: Segundos de validez; None para que no venza (solo sale por desalojo LRU).
+        """
+        if size > self.max_bytes:
+            return # Nunca cabría: no se desaloja toda la caché por un solo valor
+        expires = None if ttl is None else self.clock() + ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, expires, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest, (_, _, oldest_size) = next(iter(self._entries.items()))
+                self._remove(oldest, oldest_size)
+                self.evictions += 1
+
+    def _remove(self, key, size: int):
+        del self._entries[key]
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Contadores de aciertos, fallos, desalojos y ocupación."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
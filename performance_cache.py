@@ -0,0 +1,141 @@
+"""
+Caché de rendimientos de portafolio ya calculados.
+
+El rendimiento de un portafolio en un período solo cambia si cambia el portafolio (su versión en PortfolioStore) o
+si llegan precios nuevos de alguno de sus símbolos (su versión en ReturnIndex). Cada resultado se guarda junto con
+esas versiones; si coinciden, una consulta repetida es una búsqueda en un diccionario.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+
+class PerformanceEntry:
+    """
+    Resultado calculado para un portafolio y un período.
+
+    Parámetros:
+    - version: Versión del portafolio con la que se calculó.
+    - stocks: Símbolos del portafolio, en el orden de returns y price_versions.
+    - returns: Rendimiento (fracción) de cada símbolo en el período.
+    - price_versions: Versión de los cierres de cada símbolo en ReturnIndex.
+    - total: Rendimiento total del portafolio (fracción).
+    """
+
+    __slots__ = ("version", "stocks", "returns", "price_versions", "total")
+
+    def __init__(self, version: int, stocks: list[str], returns: np.ndarray, price_versions: np.ndarray, total: float):
+        self.version = version
+        self.stocks = stocks
+        self.returns = returns
+        self.price_versions = price_versions
+        self.total = total
+
+
+class PerformanceCache:
+    """
+    Resultados por usuario y período, con desalojo LRU por usuario.
+
+    Parámetros:
+    - max_users: Máximo de usuarios con resultados guardados.
+    - max_periods: Máximo de períodos guardados por usuario (se descarta el más antiguo).
+    """
+
+    def __init__(self, max_users: int, max_periods: int = 16):
+        self.max_users = max_users
+        self.max_periods = max_periods
+        self._users: OrderedDict[str, OrderedDict[tuple[date, date], PerformanceEntry]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, version: int, start: date, end: date) -> PerformanceEntry | None:
+        """
+        Resultado guardado para la versión indicada del portafolio, o None.
+
+        No comprueba las versiones de precios: eso lo hace quien llama, después de cargar los cierres.
+        """
+        with self._lock:
+            periods = self._users.get(user_id)
+            entry = periods.get((start, end)) if periods is not None else None
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._users.move_to_end(user_id)
+            self.hits += 1
+            return entry
+
+    def put(self, user_id: str, start: date, end: date, entry: PerformanceEntry):
+        with self._lock:
+            periods = self._users.get(user_id)
+            if periods is None:
+                periods = self._users[user_id] = OrderedDict()
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            # Los resultados de otra versión del portafolio ya no sirven.
+            for key in [key for key, old in periods.items() if old.version != entry.version]:
+                del periods[key]
+            periods[(start, end)] = entry
+            periods.move_to_end((start, end))
+            if len(periods) > self.max_periods:
+                periods.popitem(last=False)
+            self._users.move_to_end(user_id)
+
+    def rebase(self, user_id: str, old_version: int, new_version: int, old_stocks: dict[str, float],
+               new_stocks: dict[str, float], lookup):
+        """
+        Ajusta los resultados del usuario a su nuevo portafolio sin recalcularlos: el total cambia en
+        (peso nuevo - peso anterior) x rendimiento, solo para las acciones que cambiaron.
+
+        Parámetros:
+        - old_version, new_version: Versión del portafolio antes y después del cambio.
+        - old_stocks, new_stocks: Portafolio ({símbolo: ponderación en %}) antes y después del cambio.
+        - lookup: Función lookup(symbol, start, end) -> (rendimiento, versión de precios) | None para las acciones
+          añadidas. Si devuelve None, el resultado de ese período se descarta (se recalculará en la próxima consulta).
+        """
+        with self._lock:
+            periods = self._users.get(user_id)
+            if periods is None:
+                return
+            for (start, end), entry in list(periods.items()):
+                del periods[(start, end)]
+                if entry.version != old_version:
+                    continue
+                position = {stock: k for k, stock in enumerate(entry.stocks)}
+                returns, price_versions = [], []
+                total = entry.total
+                for stock, weight in new_stocks.items():
+                    if stock in position:
+                        value, price_version = entry.returns[position[stock]], entry.price_versions[position[stock]]
+                    else:
+                        found = lookup(stock, start, end)
+                        if found is None:
+                            break
+                        value, price_version = found
+                    total += (weight - old_stocks.get(stock, 0)) / 100 * value
+                    returns.append(value)
+                    price_versions.append(price_version)
+                else:
+                    for stock in old_stocks.keys() - new_stocks.keys():
+                        total -= old_stocks[stock] / 100 * entry.returns[position[stock]]
+                    periods[(start, end)] = PerformanceEntry(
+                        new_version, list(new_stocks), np.array(returns), np.array(price_versions, dtype=np.int64), total
+                    )
+
+    def invalidate(self, user_id: str):
+        """Descarta todos los resultados del usuario (al modificar o eliminar su portafolio)."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._users),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,100 @@
+"""
+Cálculo vectorizado del rendimiento de muchos portafolios a la vez.
+
+Todos los portafolios se convierten en una matriz dispersa de ponderaciones (usuarios x símbolos), guardada en
+formato de coordenadas (fila, columna, peso). El rendimiento de todos los usuarios es el producto de esa matriz por
+el vector de rendimientos de cada símbolo, en una sola operación de NumPy.
+
+Ejemplo de uso desde Python (como en POST /portfolios/performance:batch, con load_closes y return_index de main.py):
+    weights = WeightMatrix.from_portfolios(portfolios_db.items())
+    await asyncio.gather(*(load_closes(symbol, start, end) for symbol in weights.symbols))
+    results = portfolio_returns(return_index, weights, start, end)
+"""
+
+from collections.abc import Iterable
+from datetime import date
+
+import numpy as np
+
+
+class WeightMatrix:
+    """
+    Matriz dispersa de ponderaciones (usuarios x símbolos).
+
+    Parámetros:
+    - user_ids: Usuarios (una fila por usuario).
+    - symbols: Símbolos (una columna por símbolo).
+    - rows, cols, weights: Coordenadas y valor (fracción, no porcentaje) de cada posición distinta de cero.
+    """
+
+    def __init__(self, user_ids: list[str], symbols: list[str], rows: np.ndarray, cols: np.ndarray, weights: np.ndarray):
+        self.user_ids = user_ids
+        self.symbols = symbols
+        self.rows = rows
+        self.cols = cols
+        self.weights = weights
+
+    @classmethod
+    def from_portfolios(cls, portfolios: Iterable[tuple[str, dict[str, float]]]) -> "WeightMatrix":
+        """Construye la matriz a partir de pares (user_id, {símbolo: ponderación en %})."""
+        user_ids, rows, cols, weights = [], [], [], []
+        columns: dict[str, int] = {} # símbolo -> columna
+        for row, (user_id, stocks) in enumerate(portfolios):
+            user_ids.append(user_id)
+            for symbol, weight in stocks.items():
+                rows.append(row)
+                cols.append(columns.setdefault(symbol.upper(), len(columns)))
+                weights.append(weight / 100)
+        return cls(
+            user_ids,
+            list(columns),
+            np.array(rows, dtype=np.int64),
+            np.array(cols, dtype=np.int64),
+            np.array(weights, dtype=np.float64),
+        )
+
+    def dot(self, symbol_values: np.ndarray) -> np.ndarray:
+        """
+        Producto matriz-vector: para cada usuario, suma de ponderación x valor del símbolo.
+
+        Un valor NaN (símbolo sin datos) solo afecta a los usuarios que tienen ese símbolo.
+        """
+        return np.bincount(self.rows, weights=self.weights * symbol_values[self.cols], minlength=len(self.user_ids))
+
+
+def portfolio_returns(return_index, weights: WeightMatrix, start: date, end: date) -> dict[str, float | None]:
+    """
+    Rendimiento de todos los portafolios de la matriz en [start, end).
+
+    Los cierres de los símbolos deben estar cargados en return_index (ver load_closes en main.py).
+
+    Retorna:
+    Diccionario user_id -> rendimiento total en % (redondeado a 2 decimales), o None si a alguno de sus símbolos
+    le faltan datos en el período.
+    """
+    totals = weights.dot(return_index.returns(weights.symbols, start, end)) * 100
+    return {
+        user_id: None if np.isnan(total) else round(float(total), 2)
+        for user_id, total in zip(weights.user_ids, totals)
+    }
+
+
+def cumulative_returns(closes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Curva diaria del rendimiento acumulado de un portafolio.
+
+    Parámetros:
+    - closes: Matriz de cierres alineados (símbolos x sesiones), con NaN en los días sin cotización.
+    - weights: Ponderación de cada símbolo como fracción.
+
+    Retorna:
+    Array con el rendimiento acumulado (fracción) de cada sesión respecto del primer cierre de cada símbolo.
+    """
+    # Relleno hacia adelante: un día sin cotización repite el último cierre conocido del símbolo.
+    positions = np.where(np.isnan(closes), 0, np.arange(closes.shape[1]))
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    filled = np.take_along_axis(closes, positions, axis=1)
+
+    first = filled[np.arange(len(filled)), np.argmax(~np.isnan(filled), axis=1)] # Primer cierre de cada símbolo en el período
+    growth = np.nan_to_num(filled / first[:, None] - 1) # Antes de su primer cierre, un símbolo aporta 0
+    return weights @ growth
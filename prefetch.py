@@ -0,0 +1,160 @@
+"""
+Precarga en segundo plano de los precios de los símbolos que aparecen en algún portafolio.
+
+Al arrancar, y cada día cuando el cierre del mercado es definitivo, se cargan las últimas sesiones de todos esos
+símbolos (con un máximo de descargas simultáneas). Así la primera consulta de rendimiento del día encuentra los datos
+ya en la caché en lugar de esperar a las descargas.
+
+Con varios workers, solo uno descarga cada ronda: el primero que la reclama en la tabla prefetch_rounds (en el
+archivo SQLite de la caché de precios, compartido por todos). Los demás esperan a que termine y después cargan en su
+índice de rendimientos lo que ya quedó en la caché, sin volver a pedirlo al proveedor.
+"""
+
+import asyncio
+import logging
+import os
+import time as clock
+from datetime import datetime, timedelta
+
+from db import LocalConnections
+
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchRounds:
+    """
+    Registro compartido entre procesos de las rondas de precarga.
+
+    Parámetros:
+    - path: Ruta del archivo SQLite (el de la caché de precios).
+    """
+
+    def __init__(self, path: str):
+        self._connections = LocalConnections(path)
+        with self.connection as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS prefetch_rounds (
+                    round TEXT PRIMARY KEY,
+                    owner INTEGER NOT NULL,
+                    finished INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    @property
+    def connection(self):
+        return self._connections.get()
+
+    def claim(self, key: str) -> bool:
+        """Reclama la ronda para este proceso. Retorna True solo para el primero que la reclama."""
+        with self.connection as conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO prefetch_rounds (round, owner) VALUES (?, ?)", (key, os.getpid()))
+            return cursor.rowcount > 0
+
+    def finish(self, key: str):
+        with self.connection as conn:
+            conn.execute("UPDATE prefetch_rounds SET finished = 1 WHERE round = ?", (key,))
+
+    def finished(self, key: str) -> bool:
+        row = self.connection.execute("SELECT finished FROM prefetch_rounds WHERE round = ?", (key,)).fetchone()
+        return bool(row and row[0])
+
+
+class PrefetchScheduler:
+    """
+    Tarea de asyncio que refresca periódicamente los precios de un conjunto de símbolos.
+
+    Parámetros:
+    - calendar: TradingCalendar de la bolsa (sesiones, zona horaria y hora a la que el cierre es definitivo).
+    - symbols: Función sin argumentos que devuelve los símbolos a precargar (se llama en cada ronda).
+    - load: Corrutina load(symbol, start, end) que deja en caché los precios de [start, end).
+    - rounds: PrefetchRounds con el que se elige qué worker descarga cada ronda.
+    - days: Días hacia atrás que se precargan en cada ronda.
+    - concurrency: Máximo de símbolos que se cargan a la vez.
+    - leader_timeout: Segundos que un worker espera a que termine la ronda de otro; pasado ese tiempo (por ejemplo,
+      si el otro worker se detuvo) carga por su cuenta.
+    - poll: Segundos entre comprobaciones mientras espera.
+    """
+
+    def __init__(self, calendar, symbols, load, rounds: PrefetchRounds, days: int, concurrency: int,
+                 leader_timeout: float = 600, poll: float = 5):
+        self.calendar = calendar
+        self.symbols = symbols
+        self.load = load
+        self.rounds = rounds
+        self.days = days
+        self.concurrency = concurrency
+        self.leader_timeout = leader_timeout
+        self.poll = poll
+        self._task: asyncio.Task | None = None
+        self.last_run: datetime | None = None
+        self.last_errors = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name="prefetch")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def next_run(self, now: datetime) -> datetime:
+        """Próximo momento de refresco: cuando es definitivo el cierre de la próxima sesión (o de la de hoy)."""
+        day = now.date()
+        while True:
+            if self.calendar.is_session(day):
+                moment = datetime.combine(day, self.calendar.settle_time, tzinfo=self.calendar.timezone)
+                if moment > now:
+                    return moment
+            day += timedelta(days=1)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Un fallo de una ronda (por ejemplo, la base de portafolios bloqueada) no detiene las siguientes.
+                logger.exception("La ronda de precarga de precios falló")
+            now = datetime.now(self.calendar.timezone)
+            await asyncio.sleep((self.next_run(now) - now).total_seconds())
+
+    async def _wait_for(self, key: str):
+        deadline = clock.monotonic() + self.leader_timeout
+        while clock.monotonic() < deadline:
+            if await asyncio.to_thread(self.rounds.finished, key):
+                return
+            await asyncio.sleep(self.poll)
+        logger.warning("La ronda de precarga %s de otro worker no terminó a tiempo; se carga sin esperar", key)
+
+    async def refresh(self):
+        """Carga las últimas self.days de todos los símbolos; los errores de un símbolo no detienen a los demás."""
+        end = self.calendar.settled_end() # Hasta la última sesión con cierre definitivo (incluida)
+        start = end - timedelta(days=self.days)
+        key = end.isoformat()
+        leader = await asyncio.to_thread(self.rounds.claim, key)
+        if not leader:
+            await self._wait_for(key)
+
+        try:
+            symbols = await asyncio.to_thread(self.symbols)
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def load(symbol: str):
+                async with semaphore:
+                    await self.load(symbol, start, end)
+
+            results = await asyncio.gather(*(load(symbol) for symbol in symbols), return_exceptions=True)
+        finally:
+            if leader:
+                await asyncio.to_thread(self.rounds.finish, key)
+
+        self.last_errors = sum(isinstance(result, Exception) for result in results)
+        self.last_run = datetime.now(self.calendar.timezone)
+        if self.last_errors:
+            logger.warning("Precarga: %d de %d símbolos fallaron", self.last_errors, len(symbols))
@@ -0,0 +1,314 @@
+"""
+Caché persistente de precios diarios (OHLCV) en SQLite.
+
+Las barras de sesiones ya cerradas nunca cambian, así que se guardan en disco la primera vez que se descargan
+y las siguientes consultas se responden sin volver a llamar a Yahoo. Solo se descargan los rangos de fechas que
+todavía no están en la caché.
+
+Yahoo ajusta todo el historial cada vez que hay un split o un dividendo: una barra descargada antes de un split y otra
+descargada después no son comparables. Por eso se guardan dos series que no dependen del momento de la descarga:
+- close (y open, high, low, volume): precios sin ajustar, los que se negociaron ese día.
+- adj_close: serie ajustada por splits y dividendos, solo para calcular rendimientos. Su escala es arbitraria: cada
+  descarga se encadena con una sesión ya guardada (se pide un día de solapamiento), así los cocientes entre dos días
+  cualesquiera son correctos aunque se hayan descargado en momentos distintos.
+Cada símbolo tiene un solo tramo continuo de sesiones guardadas, que crece por sus extremos, para que siempre haya
+una sesión con la que encadenar.
+"""
+
+import logging
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from db import LocalConnections, connect
+from timeseries import ClosePrices
+
+if TYPE_CHECKING:
+    import pandas as pd # Se importa dentro de los métodos que lo usan: las rutas de cierres no lo necesitan
+
+
+logger = logging.getLogger(__name__)
+
+
+EPOCH = date(1970, 1, 1)
+
+# Versión del esquema de la base (PRAGMA user_version). Las versiones anteriores guardaban precios ajustados a la
+# fecha de descarga, que no se pueden convertir: al abrir una base antigua se descarta su contenido.
+SCHEMA_VERSION = 2
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+
+def to_day(value: date) -> int:
+    """Convierte una fecha en número de días desde 1970-01-01 (así se guardan las fechas en la base)."""
+    return (value - EPOCH).days
+
+
+def from_day(day: int) -> date:
+    """Operación inversa de to_day."""
+    return EPOCH + timedelta(days=day)
+
+
+class PriceCache:
+    """
+    Caché de barras diarias por símbolo.
+
+    Parámetros:
+    - path: Ruta del archivo SQLite.
+    - fetch: Función fetch(symbol, start, end) que descarga el historial [start, end) y devuelve un DataFrame
+      con el mismo formato que yf.Ticker(symbol).history(..., auto_adjust=False) (ver PriceProvider.history).
+    - settled_end: Función que devuelve el primer día cuyo cierre todavía puede cambiar (en la fecha de la bolsa).
+    """
+
+    def __init__(self, path: str, fetch, settled_end=date.today):
+        self.path = path
+        self.fetch = fetch
+        self.settled_end = settled_end
+        self._connections = LocalConnections(path)
+        self._write_lock = threading.Lock()
+        self._create_tables()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _create_tables(self):
+        conn = self.connection
+        conn.execute("BEGIN IMMEDIATE") # Varios workers pueden abrir la base a la vez: solo uno la migra.
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS bars")
+                conn.execute("DROP TABLE IF EXISTS coverage")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL, dividends REAL, splits REAL, adj_close REAL,
+                    PRIMARY KEY (symbol, day)
+                ) WITHOUT ROWID
+                """
+            )
+            # Rangos [start, end) ya descargados por símbolo; permiten distinguir "no hay datos" de "no se ha descargado".
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS coverage (
+                    symbol TEXT NOT NULL,
+                    start_day INTEGER NOT NULL,
+                    end_day INTEGER NOT NULL,
+                    PRIMARY KEY (symbol, start_day)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def missing_ranges(self, symbol: str, start: date, end: date) -> list[tuple[date, date]]:
+        """
+        Calcula los sub-rangos de [start, end) que todavía no se han descargado para el símbolo.
+
+        Retorna:
+        Lista de tuplas (inicio, fin) con fin exclusivo.
+        """
+        lo, hi = to_day(start), to_day(end)
+        rows = self.connection.execute(
+            "SELECT start_day, end_day FROM coverage WHERE symbol = ? AND end_day > ? AND start_day < ? ORDER BY start_day",
+            (symbol, lo, hi),
+        ).fetchall()
+
+        gaps = []
+        cursor = lo
+        for covered_start, covered_end in rows:
+            if covered_start > cursor:
+                gaps.append((from_day(cursor), from_day(covered_start)))
+            cursor = max(cursor, covered_end)
+        if cursor < hi:
+            gaps.append((from_day(cursor), from_day(hi)))
+        return gaps
+
+    def covering_range(self, symbol: str, start: date, end: date) -> tuple[date, date] | None:
+        """
+        Rango continuo ya descargado que contiene [start, end).
+
+        Retorna:
+        Tupla (inicio, fin) con fin exclusivo, o None si [start, end) no está descargado por completo.
+        """
+        row = self.connection.execute(
+            "SELECT start_day, end_day FROM coverage WHERE symbol = ? AND start_day <= ? AND end_day >= ?",
+            (symbol.upper(), to_day(start), to_day(end)),
+        ).fetchone()
+        return None if row is None else (from_day(row[0]), from_day(row[1]))
+
+    def get_closes(self, symbol: str, start: date, end: date) -> ClosePrices:
+        """
+        Devuelve las fechas y los cierres (sin ajustar y ajustados) de [start, end) en arrays compactos, descargando
+        solo los rangos que faltan.
+
+        Parámetros:
+        - symbol: El símbolo de la acción (ejemplo: AAPL).
+        - start: Fecha de inicio (incluida).
+        - end: Fecha de fin (excluida), igual que en yfinance.
+
+        Retorna:
+        ClosePrices con las sesiones de [start, end) que tienen precio de cierre.
+        """
+        self.ensure(symbol, start, end)
+        return self.read_closes(symbol, start, end)
+
+    def read_closes(self, symbol: str, start: date, end: date) -> ClosePrices:
+        """Cierres de [start, end) que ya están guardados, sin descargar nada."""
+        rows = self.connection.execute(
+            "SELECT day, close, adj_close FROM bars "
+            "WHERE symbol = ? AND day >= ? AND day < ? AND close IS NOT NULL AND adj_close IS NOT NULL ORDER BY day",
+            (symbol.upper(), to_day(start), to_day(end)),
+        ).fetchall()
+        days = np.fromiter((row[0] for row in rows), dtype=np.int32, count=len(rows))
+        closes = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        adjusted = np.fromiter((row[2] for row in rows), dtype=np.float32, count=len(rows))
+        return ClosePrices(days, np.rint(closes * 100), adjusted)
+
+    def ensure(self, symbol: str, start: date, end: date):
+        """
+        Descarga y guarda los rangos de [start, end) que todavía no están en la caché.
+
+        Cada descarga se amplía para que quede pegada al tramo ya guardado y lo solape en una sesión (con la que se
+        encadenan los precios). La primera descarga de un símbolo llega hasta hoy: así sus splits posteriores ya están
+        incluidos y los precios sin ajustar se pueden reconstruir.
+        """
+        symbol = symbol.upper()
+        horizon = self.settled_end() + timedelta(days=1) # Incluye la sesión de hoy (y su split, si lo hay)
+        for gap_start, gap_end in self.missing_ranges(symbol, start, end):
+            if not self.missing_ranges(symbol, gap_start, gap_end):
+                continue # Lo cubrió la descarga ampliada de un hueco anterior
+            before = self._edge_bar(symbol, gap_start, last=True)
+            after = self._edge_bar(symbol, gap_end, last=False)
+            if before is not None: # Desde la última sesión guardada antes del hueco
+                anchor, fetch_start = before, from_day(before[0])
+                fetch_end = gap_end if after is not None else max(gap_end, horizon)
+            elif after is not None: # Hasta la primera sesión guardada después del hueco (incluida)
+                anchor, fetch_start, fetch_end = after, gap_start, from_day(after[0] + 1)
+            else: # Primera descarga del símbolo
+                anchor, fetch_start, fetch_end = None, gap_start, max(gap_end, horizon)
+            self._store(symbol, fetch_start, fetch_end, self.fetch(symbol, fetch_start, fetch_end), anchor)
+
+    def _edge_bar(self, symbol: str, boundary: date, last: bool) -> tuple[int, float, float] | None:
+        """
+        Barra guardada más cercana a un hueco, dentro del rango descargado que lo toca.
+
+        Parámetros:
+        - boundary: Inicio del hueco (last=True: se busca la última barra del rango que termina ahí) o su fin
+          (last=False: la primera barra del rango que empieza ahí).
+
+        Retorna:
+        Tupla (day, close, adj_close), o None si ningún rango descargado toca el hueco o no tiene barras.
+        """
+        day = to_day(boundary)
+        if last:
+            sql = (
+                "SELECT b.day, b.close, b.adj_close FROM coverage c JOIN bars b ON b.symbol = c.symbol "
+                "AND b.day >= c.start_day AND b.day < c.end_day WHERE c.symbol = ? AND c.end_day = ? ORDER BY b.day DESC LIMIT 1"
+            )
+        else:
+            sql = (
+                "SELECT b.day, b.close, b.adj_close FROM coverage c JOIN bars b ON b.symbol = c.symbol "
+                "AND b.day >= c.start_day AND b.day < c.end_day WHERE c.symbol = ? AND c.start_day = ? ORDER BY b.day LIMIT 1"
+            )
+        row = self.connection.execute(sql, (symbol, day)).fetchone()
+        if row is None or row[1] is None or row[2] is None:
+            return None
+        return row
+
+    def iter_bars(self, symbol: str, start: date, end: date, batch_size: int = 1000):
+        """
+        Recorre las barras guardadas de [start, end) en bloques, sin cargar el rango completo en memoria.
+
+        Usa una conexión propia, que se cierra al terminar (o al abandonar el generador).
+
+        Retorna:
+        Generador de listas de tuplas (day, open, high, low, close, volume, dividends, splits, adj_close).
+        """
+        conn = connect(self.path, check_same_thread=False)
+        try:
+            cursor = conn.execute(
+                "SELECT day, open, high, low, close, volume, dividends, splits, adj_close FROM bars "
+                "WHERE symbol = ? AND day >= ? AND day < ? ORDER BY day",
+                (symbol.upper(), to_day(start), to_day(end)),
+            )
+            while rows := cursor.fetchmany(batch_size):
+                yield rows
+        finally:
+            conn.close()
+
+    def _store(self, symbol: str, start: date, end: date, history: "pd.DataFrame", anchor: tuple[int, float, float] | None = None):
+        """
+        Guarda una descarga: reconstruye los precios sin ajustar y encadena la serie ajustada con la barra anchor.
+
+        Parámetros:
+        - anchor: Barra ya guardada (day, close, adj_close) que la descarga incluye, o None si no hay con qué encadenar
+          (primera descarga del símbolo, que llega hasta hoy).
+        """
+        if history.empty:
+            # yfinance devuelve un DataFrame vacío ante algunos fallos transitorios: no se marca el rango como
+            # descargado (si no, un fallo momentáneo sería un 404 permanente); se volverá a pedir en la próxima consulta.
+            return
+
+        index = history.index.tz_localize(None) if history.index.tz is not None else history.index
+        days = index.normalize().values.astype("datetime64[D]").astype("int64")
+        columns = {c: history[c].to_numpy(dtype=np.float64) if c in history else np.zeros(len(history)) for c in COLUMNS}
+        adjusted = history["Adj Close"].to_numpy(dtype=np.float64) if "Adj Close" in history else columns["Close"]
+
+        # Close viene ajustado por los splits ocurridos hasta el momento de la descarga: se multiplica por los splits
+        # posteriores a cada día (los del propio rango; los siguientes, hasta hoy, se deducen de la barra anchor).
+        ratios = np.where(columns["Stock Splits"] > 0, columns["Stock Splits"], 1.0)
+        later_splits = np.cumprod(ratios[::-1])[::-1] / ratios
+        scale = adjusted_scale = 1.0
+        keep = np.ones(len(days), dtype=bool)
+        if anchor is not None:
+            anchor_day, anchor_close, anchor_adjusted = anchor
+            matches = np.flatnonzero(days == anchor_day)
+            if len(matches) and columns["Close"][matches[0]] > 0 and adjusted[matches[0]] > 0:
+                k = matches[0]
+                scale = anchor_close / (columns["Close"][k] * later_splits[k])
+                adjusted_scale = anchor_adjusted / adjusted[k]
+                keep[k] = False # La barra guardada no se reescribe: sus precios ya no cambian
+            else:
+                logger.warning("La descarga de %s no incluye la sesión %s ya guardada: no se puede encadenar", symbol, from_day(anchor_day))
+        factor = later_splits * scale
+
+        values = [
+            columns["Open"] * factor,
+            columns["High"] * factor,
+            columns["Low"] * factor,
+            columns["Close"] * factor,
+            columns["Volume"] / factor,
+            columns["Dividends"] * factor, # Yahoo también ajusta los dividendos por splits
+            columns["Stock Splits"],
+            adjusted * adjusted_scale,
+        ]
+        rows = [(symbol, int(day), *row) for day, *row in zip(days[keep], *(v[keep].tolist() for v in values))]
+
+        # La sesión de hoy puede seguir abierta (o su cierre aún no ser definitivo): se guarda la barra pero no se marca
+        # el día como descargado.
+        covered_end = min(to_day(end), to_day(self.settled_end()))
+
+        with self._write_lock, self.connection as conn:
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if to_day(start) < covered_end:
+                self._add_coverage(conn, symbol, to_day(start), covered_end)
+
+    @staticmethod
+    def _add_coverage(conn: sqlite3.Connection, symbol: str, start: int, end: int):
+        # Se fusiona el nuevo rango con los que se solapan o tocan para mantener la tabla compacta.
+        where = "WHERE symbol = ? AND end_day >= ? AND start_day <= ?"
+        overlapping = conn.execute(f"SELECT start_day, end_day FROM coverage {where}", (symbol, start, end)).fetchall()
+        conn.execute(f"DELETE FROM coverage {where}", (symbol, start, end))
+        for covered_start, covered_end in overlapping:
+            start, end = min(start, covered_start), max(end, covered_end)
+        conn.execute("INSERT INTO coverage VALUES (?, ?, ?)", (symbol, start, end))
@@ -0,0 +1,154 @@
+"""
+Proveedores de datos de mercado.
+
+Las rutas de la API no llaman a yfinance directamente sino a un PriceProvider. Así se puede cambiar Yahoo Finance
+por datos locales (archivos de prueba o una serie sintética) para hacer pruebas de carga sin conexión a internet.
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from symbols import check_symbol
+from trading_calendar import get_calendar
+
+# pandas y yfinance tardan en importarse (yfinance arrastra requests, curl_cffi, lxml, bs4...): se importan dentro de
+# los métodos que los usan, la primera vez que hace falta obtener precios.
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume", "Dividends", "Stock Splits"]
+
+
+class PriceProvider(ABC):
+    """Interfaz común de los proveedores de precios."""
+
+    @abstractmethod
+    def history(self, symbol: str, start: date, end: date) -> "pd.DataFrame":
+        """
+        Devuelve el historial diario del símbolo.
+
+        Parámetros:
+        - symbol: El símbolo de la acción (ejemplo: AAPL).
+        - start: Fecha de inicio (incluida).
+        - end: Fecha de fin (excluida).
+
+        Retorna:
+        DataFrame indexado por fecha con las columnas de COLUMNS (vacío si no hay datos), como
+        yf.Ticker(symbol).history(auto_adjust=False): Open/High/Low/Close ajustados solo por los splits ocurridos hasta
+        la descarga, Adj Close ajustado además por dividendos, y los splits (Stock Splits) de cada día.
+        Un fallo de la descarga se lanza como excepción: un DataFrame vacío significa que no hay precios.
+        """
+
+
+class YFinanceProvider(PriceProvider):
+    """Descarga los precios desde Yahoo Finance."""
+
+    def history(self, symbol: str, start: date, end: date) -> "pd.DataFrame":
+        import pandas as pd
+        import yfinance as yf
+        from yfinance.exceptions import YFTickerMissingError
+
+        try:
+            # raise_errors: sin él, yfinance devuelve un DataFrame vacío también cuando la descarga falla.
+            return yf.Ticker(symbol).history(start=start, end=end, auto_adjust=False, actions=True, raise_errors=True)
+        except YFTickerMissingError: # Símbolo desconocido o sin precios en el rango
+            return pd.DataFrame(columns=COLUMNS)
+
+
+class LocalProvider(PriceProvider):
+    """
+    Proveedor determinista que no usa la red.
+
+    Si existe un archivo <fixtures_dir>/<SYMBOL>.csv o <SYMBOL>.parquet (mismo formato que history().to_csv(); si no
+    tiene columna Adj Close se usa Close), se leen los precios desde ahí. Si no, se genera un paseo aleatorio en las
+    sesiones de NYSE, siempre igual para el mismo símbolo y semilla.
+
+    Parámetros:
+    - fixtures_dir: Carpeta con los archivos de precios (opcional).
+    - seed: Semilla que se combina con el símbolo para generar la serie sintética.
+    """
+
+    ORIGIN = date(2000, 1, 3) # Primer día de la serie sintética.
+
+    def __init__(self, fixtures_dir: str | None = None, seed: int = 0):
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+        self.seed = seed
+
+    def history(self, symbol: str, start: date, end: date) -> "pd.DataFrame":
+        import pandas as pd
+
+        data = self._read_fixture(symbol)
+        if data is None:
+            data = self._random_walk(symbol, end)
+        return data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+    def _read_fixture(self, symbol: str) -> "pd.DataFrame | None":
+        import pandas as pd
+
+        if self.fixtures_dir is None:
+            return None
+        symbol = check_symbol(symbol) # El símbolo es parte de la ruta del archivo
+        csv_path = self.fixtures_dir / f"{symbol}.csv"
+        parquet_path = self.fixtures_dir / f"{symbol}.parquet"
+        if csv_path.exists():
+            data = pd.read_csv(csv_path, index_col=0)
+        elif parquet_path.exists():
+            data = pd.read_parquet(parquet_path)
+        else:
+            return None
+        # Solo interesa la fecha: se descarta la hora y la zona horaria que yfinance escribe en el índice.
+        data.index = pd.to_datetime(data.index.astype(str).str[:10])
+        if "Adj Close" not in data:
+            data["Adj Close"] = data["Close"]
+        return data.reindex(columns=COLUMNS, fill_value=0.0).sort_index()
+
+    def _random_walk(self, symbol: str, end: date) -> "pd.DataFrame":
+        import pandas as pd
+
+        # La serie siempre empieza en ORIGIN, así el precio de un día no depende del rango pedido.
+        # Igual que Yahoo, no hay precios después de hoy (fecha de la bolsa): la sesión de hoy es la última.
+        calendar = get_calendar("NYSE")
+        end = min(end, calendar.today() + timedelta(days=1))
+        index = pd.DatetimeIndex(calendar.sessions(self.ORIGIN, end))
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.upper().encode())])
+        start_price = rng.uniform(10, 500)
+        close = start_price * np.exp(np.cumsum(rng.normal(0.0001, 0.015, len(index))))
+        spread = close * 0.01
+        return pd.DataFrame(
+            {
+                "Open": close - spread / 2,
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Adj Close": close,
+                "Volume": np.full(len(index), 1_000_000.0),
+                "Dividends": 0.0,
+                "Stock Splits": 0.0,
+            },
+            index=index,
+        )
+
+
+def create_provider(name: str, fixtures_dir: str | None = None, seed: int = 0) -> PriceProvider:
+    """
+    Crea el proveedor configurado.
+
+    Parámetros:
+    - name: "yfinance" o "local".
+    - fixtures_dir: Carpeta de archivos de precios para el proveedor local.
+    - seed: Semilla de la serie sintética del proveedor local.
+
+    Retorna:
+    Una instancia de PriceProvider.
+    """
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "local":
+        return LocalProvider(fixtures_dir, seed)
+    raise ValueError(f"Proveedor de precios desconocido: {name}")
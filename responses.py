@@ -0,0 +1,20 @@
+"""
+Respuesta JSON rápida para todas las rutas de la API.
+"""
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa con orjson en lugar del módulo json de la biblioteca estándar.
+
+    orjson es varias veces más rápido que json. Ojo: cuando una ruta devuelve un diccionario, FastAPI lo pasa antes
+    por jsonable_encoder, que no acepta arrays ni escalares de NumPy distintos de numpy.float64 (por ejemplo,
+    numpy.float32): esas rutas deben devolver tipos de Python (float(...), .tolist()). Solo una ruta que devuelve
+    FastJSONResponse(datos) directamente se salta jsonable_encoder y puede entregar tipos de NumPy a orjson.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
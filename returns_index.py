@@ -0,0 +1,154 @@
+"""
+Índice de precios de cierre alineados a un eje global de sesiones bursátiles.
+
+Cada símbolo guarda un array de cierres con una posición por sesión del calendario. El rendimiento de un símbolo
+entre dos fechas son dos lecturas del array, y el de un portafolio es un producto escalar con sus ponderaciones.
+Los cierres son los ajustados por splits y dividendos (ClosePrices.adjusted, float32): su escala no tiene sentido
+por sí sola, solo los cocientes entre dos sesiones (que se calculan en float64).
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from timeseries import ClosePrices, day_numbers
+
+
+class ReturnIndex:
+    """
+    Cierres por símbolo sobre el eje de sesiones del calendario.
+
+    Las rutas piden primero a needed_range qué fechas faltan, las obtienen del proveedor (con la caché de precios)
+    y las guardan con add; después returns responde sin recorrer el historial.
+
+    Parámetros:
+    - calendar: TradingCalendar que define el eje de sesiones.
+    - start: Primera fecha del eje. Los rangos que empiezan antes lanzan ValueError (no se recortan en silencio).
+    """
+
+    def __init__(self, calendar, start: date):
+        self.calendar = calendar
+        self.start = start
+        self.axis = day_numbers(calendar.sessions(start, calendar.today() + timedelta(days=366)))
+        self._closes: dict[str, np.ndarray] = {}
+        self._loaded: dict[str, tuple[int, int]] = {} # símbolo -> posiciones [inicio, fin) del eje ya cargadas
+        self._versions: dict[str, int] = {} # símbolo -> número de veces que han cambiado sus cierres
+        self._lock = threading.Lock()
+
+    def _positions(self, start: date, end: date) -> tuple[int, int]:
+        """Posiciones [i, j) del eje que caen en [start, end)."""
+        if start < self.start:
+            raise ValueError(f"La fecha de inicio no puede ser anterior a {self.start.isoformat()}")
+        self._extend(end)
+        days = day_numbers([start, end])
+        i, j = np.searchsorted(self.axis, days, side="left")
+        return int(i), int(j)
+
+    def _extend(self, end: date):
+        # El eje cubre hasta un año después de hoy; si el servidor lleva tiempo encendido, se alarga.
+        last = self._date(len(self.axis) - 1)
+        end = min(end, self.calendar.today() + timedelta(days=366)) # Más allá no hay precios que guardar.
+        if end <= last:
+            return
+        with self._lock:
+            extra = day_numbers(self.calendar.sessions(last + timedelta(days=1), end + timedelta(days=366)))
+            self.axis = np.concatenate([self.axis, extra])
+            for symbol, closes in self._closes.items():
+                self._closes[symbol] = np.concatenate([closes, np.full(len(extra), np.nan, dtype=np.float32)])
+
+    def needed_range(self, symbol: str, start: date, end: date) -> tuple[date, date] | None:
+        """
+        Calcula qué rango hay que cargar para poder responder [start, end) del símbolo.
+
+        Retorna:
+        Tupla (inicio, fin) con fin exclusivo, o None si ya está todo cargado.
+        """
+        i, j = self._positions(start, end)
+        loaded = self._loaded.get(symbol.upper())
+        if loaded is None:
+            return start, end
+        lo, hi = loaded
+        if lo <= i and j <= hi:
+            return None
+        # El tramo cargado se mantiene contiguo: se pide desde donde falta hasta donde empieza o termina lo cargado.
+        fetch_start = start if i < lo else self._date(hi)
+        fetch_end = end if j > hi else self._date(lo)
+        return fetch_start, fetch_end
+
+    def _date(self, position: int) -> date:
+        return date(1970, 1, 1) + timedelta(days=int(self.axis[position]))
+
+    def add(self, symbol: str, history: ClosePrices, start: date, end: date):
+        """
+        Guarda en el índice los cierres de history, obtenidos para el rango [start, end).
+
+        La sesión de hoy puede seguir abierta: su cierre se guarda, pero no se marca como cargada.
+        """
+        symbol = symbol.upper()
+        i, j = self._positions(start, end)
+        today = int(np.searchsorted(self.axis, day_numbers([self.calendar.today()])[0], side="left"))
+        with self._lock:
+            closes = self._closes.get(symbol)
+            if closes is None:
+                closes = self._closes[symbol] = np.full(len(self.axis), np.nan, dtype=np.float32)
+            if not history.empty:
+                positions = np.searchsorted(self.axis, history.days).clip(max=len(self.axis) - 1)
+                valid = self.axis[positions] == history.days # Se descartan los días que no son sesión según el calendario.
+                new = history.adjusted[valid] # Rendimientos con splits y dividendos
+                if not np.array_equal(closes[positions[valid]], new, equal_nan=True):
+                    closes[positions[valid]] = new
+                    self._versions[symbol] = self._versions.get(symbol, 0) + 1
+
+            j = min(j, today)
+            if i < j:
+                lo, hi = self._loaded.get(symbol, (i, j))
+                if j >= lo and i <= hi: # Solo se amplía el tramo cargado si queda contiguo.
+                    self._loaded[symbol] = (min(lo, i), max(hi, j))
+
+    def versions(self, symbols: list[str]) -> np.ndarray:
+        """
+        Versión de los cierres de cada símbolo: cambia solo cuando add guarda precios distintos de los que había.
+
+        Sirve para saber si un resultado calculado antes sigue valiendo (ver PerformanceCache).
+        """
+        return np.array([self._versions.get(symbol.upper(), 0) for symbol in symbols], dtype=np.int64)
+
+    def returns(self, symbols: list[str], start: date, end: date) -> np.ndarray:
+        """
+        Rendimiento de cada símbolo entre el primer y el último cierre disponibles en [start, end).
+
+        Retorna:
+        Array de rendimientos (NaN para los símbolos sin datos en el período).
+        """
+        i, j = self._positions(start, end)
+        initial = np.full(len(symbols), np.nan)
+        final = np.full(len(symbols), np.nan)
+        if i < j:
+            for k, symbol in enumerate(symbols):
+                closes = self._closes.get(symbol.upper())
+                if closes is None:
+                    continue
+                initial[k], final[k] = closes[i], closes[j - 1] # Caso habitual: dos lecturas del array.
+                if np.isnan(initial[k]) or np.isnan(final[k]):
+                    # Días sin cotización en los extremos (símbolo aún no listado, cierre no previsto): se buscan los más cercanos dentro del período.
+                    window = closes[i:j]
+                    valid = np.flatnonzero(~np.isnan(window))
+                    if len(valid):
+                        initial[k], final[k] = window[valid[0]], window[valid[-1]]
+        return (final - initial) / initial
+
+    def closes(self, symbols: list[str], start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Matriz de cierres alineados de varios símbolos en [start, end).
+
+        Retorna:
+        Tupla (sesiones como datetime64[D], matriz símbolos x sesiones con NaN donde no hay cotización).
+        """
+        i, j = self._positions(start, end)
+        matrix = np.full((len(symbols), max(j - i, 0)), np.nan)
+        for k, symbol in enumerate(symbols):
+            closes = self._closes.get(symbol.upper())
+            if closes is not None:
+                matrix[k] = closes[i:j]
+        return self.axis[i:j].astype("datetime64[D]"), matrix
@@ -0,0 +1,42 @@
+"""
+Lanzador de la API en modo multiproceso.
+
+Arranca N workers de uvicorn (con uvloop y httptools) que comparten el estado a través de los archivos SQLite
+de config.PORTFOLIOS_DB_PATH y config.PRICE_CACHE_PATH, así el rendimiento escala con los núcleos disponibles.
+
+Ejemplo de uso:
+    python serve.py --workers 4 --port 8000
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lanza la API de precios con varios workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--loop", default="uvloop", help="Bucle de eventos de uvicorn (uvloop, asyncio, auto)")
+    parser.add_argument("--http", default="httptools", help="Implementación HTTP de uvicorn (httptools, h11, auto)")
+    args = parser.parse_args()
+
+    # Se importa la aplicación antes de lanzar los workers: si hay un error de configuración se ve aquí una sola vez,
+    # y las tablas SQLite quedan creadas antes de que varios procesos intenten crearlas a la vez.
+    import main  # noqa: F401
+
+    uvicorn.run(
+        "main:app", # Cada worker importa la aplicación por su nombre.
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        access_log=False, # El registro de cada petición cuesta más que muchas de las respuestas.
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Agrupación de peticiones idénticas en curso ("single-flight").
+
+Si muchas peticiones piden lo mismo a la vez (por ejemplo, el precio de AAPL al abrir el mercado), solo la primera
+hace el trabajo y las demás esperan su resultado, en lugar de repetir la misma descarga.
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    """Comparte una única ejecución entre las llamadas concurrentes con la misma clave."""
+
+    def __init__(self):
+        self._calls: dict = {} # clave -> Future de la ejecución en curso
+
+    async def do(self, key, func):
+        """
+        Ejecuta func() o se une a una ejecución en curso con la misma clave.
+
+        Parámetros:
+        - key: Clave que identifica el trabajo (ejemplo: (symbol, start, end)).
+        - func: Función sin argumentos que devuelve un awaitable con el resultado.
+
+        Retorna:
+        El resultado (o la excepción) de la ejecución compartida.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None)) # Al terminar, la siguiente llamada vuelve a ejecutar.
+        # shield: si una petición se cancela (timeout, cliente desconectado) el trabajo sigue para las demás.
+        return await asyncio.shield(future)
+
+    def __len__(self):
+        return len(self._calls)
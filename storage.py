@@ -0,0 +1,212 @@
+"""
+Almacén persistente de portafolios en SQLite.
+
+Reemplaza al diccionario en memoria: los portafolios sobreviven a los reinicios y varios workers de uvicorn
+comparten el mismo archivo. Se usa como un diccionario (user_id -> {símbolo: ponderación}), con operaciones
+atómicas adicionales para crear, actualizar y borrar sin condiciones de carrera entre procesos.
+"""
+
+import json
+from collections.abc import Iterator
+
+from db import LocalConnections, connect
+
+
+class PortfolioStore:
+    """
+    Portafolios de los usuarios guardados en SQLite (modo WAL).
+
+    Cada escritura asigna al portafolio un número de versión nuevo, único en todo el almacén.
+
+    Parámetros:
+    - path: Ruta del archivo SQLite.
+    """
+
+    def __init__(self, path: str):
+        self._connections = LocalConnections(path)
+        with self.connection as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS portfolios (
+                    user_id TEXT PRIMARY KEY,
+                    stocks TEXT NOT NULL,
+                    version INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('portfolio_version', 0)")
+
+    @property
+    def connection(self):
+        return self._connections.get()
+
+    @staticmethod
+    def _next_version(conn) -> int:
+        # Contador global: un portafolio borrado y vuelto a crear nunca repite versión.
+        return conn.execute(
+            "UPDATE counters SET value = value + 1 WHERE name = 'portfolio_version' RETURNING value"
+        ).fetchone()[0]
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM portfolios WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def __getitem__(self, user_id: str) -> dict[str, float]:
+        row = self.connection.execute("SELECT stocks FROM portfolios WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            raise KeyError(user_id)
+        return json.loads(row[0])
+
+    def get(self, user_id: str, default=None):
+        try:
+            return self[user_id]
+        except KeyError:
+            return default
+
+    def get_many(self, user_ids: list[str], batch_size: int = 500) -> dict[str, dict[str, float]]:
+        """Devuelve los portafolios existentes de una lista de usuarios (los que no existen se omiten)."""
+        found = {}
+        for i in range(0, len(user_ids), batch_size):
+            chunk = user_ids[i:i + batch_size]
+            rows = self.connection.execute(
+                f"SELECT user_id, stocks FROM portfolios WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update((user_id, json.loads(stocks)) for user_id, stocks in rows)
+        return found
+
+    def get_with_version(self, user_id: str) -> tuple[dict[str, float], int] | None:
+        """Devuelve el portafolio y su versión (leídos juntos), o None si no existe."""
+        row = self.connection.execute("SELECT stocks, version FROM portfolios WHERE user_id = ?", (user_id,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def version(self, user_id: str) -> int | None:
+        """Devuelve la versión actual del portafolio, o None si no existe."""
+        row = self.connection.execute("SELECT version FROM portfolios WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def insert(self, user_id: str, stocks: dict[str, float]) -> bool:
+        """
+        Crea el portafolio si el usuario todavía no tiene uno.
+
+        Retorna:
+        True si se creó, False si ya existía.
+        """
+        with self.connection as conn:
+            version = self._next_version(conn) # Toma el bloqueo de escritura: la comprobación y el INSERT son atómicos.
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO portfolios VALUES (?, ?, ?)", (user_id, json.dumps(stocks), version)
+            )
+            return cursor.rowcount > 0
+
+    def insert_many(self, records: list[tuple[str, dict[str, float]]], batch_size: int = 500) -> list[int]:
+        """
+        Crea los portafolios de varios usuarios en una sola transacción (los que ya existen no se modifican).
+
+        Retorna:
+        Posiciones en records de los portafolios que no se crearon porque el usuario ya tenía uno (o estaba repetido).
+        """
+        if not records:
+            return []
+        with self.connection as conn:
+            # Se reservan len(records) versiones de una vez; esto también toma el bloqueo de escritura.
+            last = conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = 'portfolio_version' RETURNING value", (len(records),)
+            ).fetchone()[0]
+            user_ids = [user_id for user_id, _ in records]
+            existing = set()
+            for i in range(0, len(user_ids), batch_size):
+                chunk = user_ids[i:i + batch_size]
+                rows = conn.execute(
+                    f"SELECT user_id FROM portfolios WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk
+                )
+                existing.update(row[0] for row in rows)
+
+            rows, rejected = [], []
+            for position, (user_id, stocks) in enumerate(records):
+                if user_id in existing:
+                    rejected.append(position)
+                    continue
+                existing.add(user_id)
+                rows.append((user_id, json.dumps(stocks), last - len(records) + 1 + position))
+            conn.executemany("INSERT INTO portfolios VALUES (?, ?, ?)", rows)
+        return rejected
+
+    def update(self, user_id: str, stocks: dict[str, float]) -> bool:
+        """
+        Reemplaza el portafolio existente de un usuario.
+
+        Retorna:
+        True si se actualizó, False si el usuario no tenía portafolio.
+        """
+        with self.connection as conn:
+            cursor = conn.execute(
+                "UPDATE portfolios SET stocks = ?, version = ? WHERE user_id = ?",
+                (json.dumps(stocks), self._next_version(conn), user_id),
+            )
+            return cursor.rowcount > 0
+
+    def modify(self, user_id: str, change) -> tuple[dict[str, float], int, dict[str, float], int] | None:
+        """
+        Lee, modifica y guarda el portafolio de un usuario en una sola transacción (ningún otro worker escribe entre
+        la lectura y la escritura).
+
+        Parámetros:
+        - change: Función change(stocks) que recibe una copia del portafolio actual y devuelve el nuevo. Si lanza una
+          excepción no se guarda nada y la excepción se propaga.
+
+        Retorna:
+        Tupla (portafolio anterior, su versión, portafolio nuevo, su versión), o None si el usuario no tenía portafolio.
+        """
+        with self.connection as conn:
+            version = self._next_version(conn) # Toma el bloqueo de escritura antes de leer.
+            row = conn.execute("SELECT stocks, version FROM portfolios WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            old, old_version = json.loads(row[0]), row[1]
+            new = change(dict(old))
+            conn.execute(
+                "UPDATE portfolios SET stocks = ?, version = ? WHERE user_id = ?", (json.dumps(new), version, user_id)
+            )
+            return old, old_version, new, version
+
+    def delete(self, user_id: str) -> bool:
+        """
+        Elimina el portafolio de un usuario.
+
+        Retorna:
+        True si se eliminó, False si no existía.
+        """
+        with self.connection as conn:
+            return conn.execute("DELETE FROM portfolios WHERE user_id = ?", (user_id,)).rowcount > 0
+
+    def items(self, batch_size: int = 1000) -> Iterator[tuple[str, dict[str, float]]]:
+        """Recorre todos los portafolios en bloques, sin cargarlos todos en memoria."""
+        cursor = self.connection.execute("SELECT user_id, stocks FROM portfolios ORDER BY user_id")
+        while rows := cursor.fetchmany(batch_size):
+            for user_id, stocks in rows:
+                yield user_id, json.loads(stocks)
+
+    def iter_rows(self, batch_size: int = 1000) -> Iterator[list[tuple[str, str]]]:
+        """
+        Recorre todos los portafolios en bloques de tuplas (user_id, stocks en JSON, tal como están guardados).
+
+        Usa una conexión propia, que se cierra al terminar (o al abandonar el generador): así puede recorrerlo un
+        StreamingResponse desde el pool de hilos de Starlette.
+        """
+        conn = connect(self._connections.path, check_same_thread=False)
+        try:
+            cursor = conn.execute("SELECT user_id, stocks FROM portfolios ORDER BY user_id")
+            while rows := cursor.fetchmany(batch_size):
+                yield rows
+        finally:
+            conn.close()
+
+    def symbols(self) -> list[str]:
+        """Símbolos (en mayúsculas) que aparecen en al menos un portafolio."""
+        rows = self.connection.execute(
+            "SELECT DISTINCT upper(stock.key) FROM portfolios, json_each(portfolios.stocks) AS stock ORDER BY 1"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM portfolios").fetchone()[0]
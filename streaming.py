@@ -0,0 +1,81 @@
+"""
+Generadores para enviar historiales de precios por partes (StreamingResponse).
+
+Cada generador recibe bloques de barras (listas de tuplas de PriceCache.iter_bars) y produce el texto o los bytes
+de cada bloque, así la memoria usada no depende de la longitud del rango pedido.
+"""
+
+import numpy as np
+import orjson
+
+
+# Precios sin ajustar (los negociados ese día); adj_close es la serie ajustada por splits y dividendos, con escala
+# arbitraria (solo sirven sus cocientes).
+FIELDS = ["date", "open", "high", "low", "close", "volume", "dividends", "stock_splits", "adj_close"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def _dates(rows) -> list[str]:
+    # Números de día -> fechas ISO, en una sola conversión de NumPy por bloque.
+    return np.array([row[0] for row in rows], dtype="datetime64[D]").astype(str).tolist()
+
+
+def ndjson_chunks(batches):
+    """Un objeto JSON por línea (serializado con orjson, como el resto de respuestas JSON)."""
+    for rows in batches:
+        yield b"".join(
+            orjson.dumps(dict(zip(FIELDS, (day, *row[1:]))), option=orjson.OPT_APPEND_NEWLINE)
+            for day, row in zip(_dates(rows), rows)
+        )
+
+
+def csv_chunks(batches):
+    """CSV con cabecera."""
+    yield ",".join(FIELDS) + "\n"
+    for rows in batches:
+        yield "".join(
+            ",".join((day, *(repr(value) for value in row[1:]))) + "\n" for day, row in zip(_dates(rows), rows)
+        )
+
+
+class _Chunks:
+    """Archivo en memoria para pyarrow: acumula lo escrito hasta que el generador lo entrega."""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def arrow_chunks(batches):
+    """Arrow IPC stream: un record batch por bloque (requiere pyarrow)."""
+    import pyarrow as pa
+
+    schema = pa.schema([("date", pa.date32())] + [(name, pa.float64()) for name in FIELDS[1:]])
+    sink = _Chunks()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            arrays = [pa.array(np.array(columns[0], dtype="datetime64[D]"), pa.date32())]
+            arrays += [pa.array(column, pa.float64()) for column in columns[1:]]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.take()
+    yield sink.take() # Marca de fin del stream
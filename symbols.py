@@ -0,0 +1,37 @@
+"""
+Validación de los símbolos de acciones.
+
+Los símbolos llegan en la URL y en los cuerpos JSON y terminan como nombres de archivo (archivos de cierres, archivos
+de precios del proveedor local). Solo se aceptan letras, dígitos y los signos que usa Yahoo Finance (BRK-B, BRK.B,
+^GSPC, EURUSD=X): nada de barras ni de nombres que empiecen por punto.
+"""
+
+import re
+from typing import Annotated
+
+from pydantic import StringConstraints
+
+
+SYMBOL_PATTERN = r"^[A-Za-z0-9^][A-Za-z0-9.\-^=]{0,14}$" # Sin distinguir mayúsculas: la API acepta "aapl"
+
+_SYMBOL = re.compile(SYMBOL_PATTERN)
+
+# Tipo para los modelos de Pydantic: un símbolo que no cumple el patrón es un error de validación (422)
+Symbol = Annotated[str, StringConstraints(pattern=SYMBOL_PATTERN)]
+
+
+def is_valid_symbol(symbol: str) -> bool:
+    """Indica si symbol cumple SYMBOL_PATTERN."""
+    return _SYMBOL.fullmatch(symbol) is not None # fullmatch: en re, $ también acepta un salto de línea final
+
+
+def check_symbol(symbol: str) -> str:
+    """
+    Comprueba un símbolo antes de usarlo como nombre de archivo.
+
+    Retorna:
+    El símbolo en mayúsculas. Lanza ValueError si no cumple SYMBOL_PATTERN.
+    """
+    if not is_valid_symbol(symbol):
+        raise ValueError(f"Símbolo no válido: {symbol!r}")
+    return symbol.upper()
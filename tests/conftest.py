@@ -0,0 +1,15 @@
+"""
+Configuración común de las pruebas.
+
+main.py abre sus bases de datos al importarse: se apuntan a una carpeta temporal antes de que una prueba lo importe,
+para no crear archivos en la carpeta del proyecto ni descargar precios de Yahoo Finance.
+"""
+
+import os
+import tempfile
+
+_data = tempfile.mkdtemp(prefix="fastapi01-tests-")
+os.environ.setdefault("PRICE_CACHE_PATH", os.path.join(_data, "prices.sqlite"))
+os.environ.setdefault("PORTFOLIOS_DB_PATH", os.path.join(_data, "portfolios.sqlite"))
+os.environ.setdefault("CLOSE_STORE_DIR", os.path.join(_data, "closes"))
+os.environ.setdefault("PRICE_PROVIDER", "local")
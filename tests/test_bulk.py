@@ -0,0 +1,89 @@
+"""
+Pruebas de la importación masiva: lectura por partes de NDJSON y CSV (bulk.py) y PortfolioStore.insert_many.
+"""
+
+import asyncio
+
+import orjson
+
+from bulk import csv_records, lines, ndjson_export, ndjson_records
+from storage import PortfolioStore
+
+
+async def _chunks(parts):
+    for part in parts:
+        yield part
+
+
+def collect(generator, *parts) -> list:
+    """Recorre un generador de bulk.py con el cuerpo partido en los bloques indicados."""
+    async def run():
+        return [item async for item in generator(_chunks(parts))]
+    return asyncio.run(run())
+
+
+def test_lines_across_chunks_keep_line_numbers():
+    # Líneas partidas entre bloques, líneas vacías (cuentan pero no se devuelven), CRLF y última línea sin salto
+    assert collect(lines, b"ab", b"c\r\n\n  \nd", b"ef\n", b"g") == [(1, "abc"), (4, "def"), (5, "g")]
+
+
+def test_ndjson_reports_bad_lines_and_continues():
+    body = b'{"user_id": "u1", "stocks": {"AAPL": 100}}\n\n{oops\n[1, 2]\n{"user_id": "u2", "stocks": {}}\n'
+    records = collect(ndjson_records, body[:10], body[10:])
+    assert [(number, record is not None) for number, record, _ in records] == [(1, True), (3, False), (4, False), (5, True)]
+    assert records[0][1] == {"user_id": "u1", "stocks": {"AAPL": 100}}
+    assert records[1][2].startswith("JSON inválido")
+    assert records[2][2] == "Cada línea debe ser un objeto JSON"
+
+
+def test_csv_groups_consecutive_rows_by_user():
+    body = b"user_id,symbol,weight\nu1,AAPL,60\nu1,MSFT,40\n\nu2,TSLA,100\nu3,AAPL,50\nu3,GOOG,50"
+    records = collect(csv_records, body[:30], body[30:])
+    assert records == [
+        (2, {"user_id": "u1", "stocks": {"AAPL": "60", "MSFT": "40"}}, None),
+        (5, {"user_id": "u2", "stocks": {"TSLA": "100"}}, None), # Número de la primera fila del usuario
+        (6, {"user_id": "u3", "stocks": {"AAPL": "50", "GOOG": "50"}}, None),
+    ]
+
+
+def test_csv_rows_that_are_not_consecutive_make_separate_records():
+    body = b"user_id,symbol,weight\nu1,AAPL,60\nu2,TSLA,100\nu1,MSFT,40\n"
+    assert [(number, record["user_id"]) for number, record, _ in collect(csv_records, body)] == [(2, "u1"), (3, "u2"), (4, "u1")]
+
+
+def test_csv_bad_rows_and_header():
+    records = collect(csv_records, b"user_id,symbol,weight\nu1,AAPL\nu1,AAPL,100\n")
+    assert records == [(2, None, "Cada fila debe tener user_id,symbol,weight"), (3, {"user_id": "u1", "stocks": {"AAPL": "100"}}, None)]
+    assert collect(csv_records, b"user,symbol,weight\nu1,AAPL,100\n") == [(1, None, "La cabecera debe ser user_id,symbol,weight")]
+
+
+def test_insert_many_rejects_existing_and_repeated_users(tmp_path):
+    store = PortfolioStore(str(tmp_path / "portfolios.sqlite"))
+    assert store.insert("u0", {"AAPL": 100.0})
+    records = [("u1", {"AAPL": 100.0}), ("u0", {"MSFT": 100.0}), ("u2", {"TSLA": 100.0}), ("u1", {"GOOG": 100.0})]
+    assert store.insert_many(records) == [1, 3]
+    assert store["u0"] == {"AAPL": 100.0} # Los que ya existían no se modifican
+    assert store["u1"] == {"AAPL": 100.0} # El primero de los repetidos gana
+    assert len(store) == 3
+    assert store.insert_many([]) == []
+
+
+def test_insert_many_reserves_one_version_per_record(tmp_path):
+    store = PortfolioStore(str(tmp_path / "portfolios.sqlite"))
+    store.insert("u0", {"AAPL": 100.0})
+    first = store.version("u0")
+    store.insert_many([("u1", {"AAPL": 100.0}), ("u0", {"AAPL": 100.0}), ("u2", {"AAPL": 100.0})])
+    # Cada registro tiene su versión según su posición, aunque se rechace (queda un hueco)
+    assert [store.version(user_id) for user_id in ("u0", "u1", "u2")] == [first, first + 1, first + 3]
+    store.insert("u3", {"AAPL": 100.0})
+    assert store.version("u3") == first + 4 # El rango reservado no se reutiliza
+
+
+def test_ndjson_export_round_trip(tmp_path):
+    store = PortfolioStore(str(tmp_path / "portfolios.sqlite"))
+    store.insert_many([("u1", {"AAPL": 60.0, "MSFT": 40.0}), ('u"2', {"TSLA": 100.0})])
+    exported = b"".join(ndjson_export(store.iter_rows()))
+    assert [orjson.loads(line) for line in exported.splitlines()] == [ # Ordenados por user_id
+        {"user_id": 'u"2', "stocks": {"TSLA": 100.0}},
+        {"user_id": "u1", "stocks": {"AAPL": 60.0, "MSFT": 40.0}},
+    ]
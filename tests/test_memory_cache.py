@@ -0,0 +1,121 @@
+"""
+Pruebas de la caché en memoria (MemoryCache) con un reloj falso, y de la regla de expiración que usa fetch_closes.
+"""
+
+import asyncio
+from datetime import date
+
+import numpy as np
+
+import config
+from memory_cache import MemoryCache
+from timeseries import ClosePrices, day_numbers
+
+
+class FakeClock:
+    """Reloj que solo avanza cuando la prueba lo pide."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = MemoryCache(max_entries=10, max_bytes=1000, clock=clock)
+    cache.put("a", 1, size=10, ttl=30)
+    cache.put("b", 2, size=10) # Sin TTL: no vence
+
+    clock.now += 29.9
+    assert cache.get("a") == 1
+    clock.now += 0.1 # Vence justo al cumplirse el TTL
+    assert cache.get("a") is None
+    clock.now += 10 ** 6
+    assert cache.get("b") == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"], stats["bytes"]) == (2, 1, 1, 1, 10)
+
+
+def test_evicts_least_recently_used_by_entries():
+    cache = MemoryCache(max_entries=2, max_bytes=1000, clock=FakeClock())
+    cache.put("a", 1, size=1)
+    cache.put("b", 2, size=1)
+    assert cache.get("a") == 1 # "b" pasa a ser el menos usado
+    cache.put("c", 3, size=1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes_and_skips_values_that_never_fit():
+    cache = MemoryCache(max_entries=10, max_bytes=100, clock=FakeClock())
+    cache.put("a", 1, size=40)
+    cache.put("b", 2, size=40)
+    cache.put("c", 3, size=40) # 120 bytes: sale "a"
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 80
+
+    cache.put("b", 2, size=60) # Reemplazar una entrada descuenta su tamaño anterior: 100 bytes, no desaloja
+    assert cache.stats()["bytes"] == 100
+    assert cache.stats()["evictions"] == 1
+
+    cache.put("huge", 0, size=101) # Nunca cabría: no se guarda ni desaloja nada
+    assert cache.get("huge") is None
+    assert cache.get("b") == 2 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["hit_rate"]) == (2, 2, 1, 0.5)
+
+
+def closes_between(start: date, end: date) -> ClosePrices:
+    days = day_numbers([start, end])
+    prices = np.full(2, 100.0)
+    return ClosePrices(days, prices * 100, prices)
+
+
+def patch_fetch_closes(monkeypatch, clock: FakeClock, today: date, result=closes_between):
+    """Deja fetch_closes de main.py sin archivos compartidos ni caché de precios; devuelve la lista de descargas."""
+    import main
+
+    downloads = []
+
+    async def run_price_task(func, symbol, start, end):
+        downloads.append((symbol, start, end))
+        return result(start, end)
+
+    monkeypatch.setattr(main, "quote_cache", MemoryCache(max_entries=10, max_bytes=10 ** 6, clock=clock))
+    monkeypatch.setattr(main, "run_price_task", run_price_task)
+    monkeypatch.setattr(main.close_store, "get", lambda symbol, start, end: None)
+    monkeypatch.setattr(main.close_store, "schedule", lambda symbol, start, end: None)
+    monkeypatch.setattr(main.market_calendar, "today", lambda: today)
+    return main.fetch_closes, downloads
+
+
+def test_fetch_closes_expires_ranges_that_reach_today(monkeypatch):
+    clock = FakeClock()
+    fetch_closes, downloads = patch_fetch_closes(monkeypatch, clock, today=date(2024, 3, 15))
+    closed = (date(2024, 3, 1), date(2024, 3, 15)) # Termina antes de hoy: no vence
+    open_ = (date(2024, 3, 1), date(2024, 3, 16)) # Incluye la sesión de hoy, que aún puede cambiar
+
+    asyncio.run(fetch_closes("AAPL", *closed))
+    asyncio.run(fetch_closes("AAPL", *open_))
+    clock.now += config.QUOTE_CACHE_OPEN_TTL - 1
+    asyncio.run(fetch_closes("aapl", *closed))
+    asyncio.run(fetch_closes("aapl", *open_))
+    assert len(downloads) == 2
+
+    clock.now += 1
+    asyncio.run(fetch_closes("AAPL", *closed))
+    asyncio.run(fetch_closes("AAPL", *open_))
+    assert downloads[2:] == [("AAPL", *open_)]
+
+
+def test_fetch_closes_does_not_cache_empty_results(monkeypatch):
+    empty = lambda start, end: ClosePrices([], [], [])
+    fetch_closes, downloads = patch_fetch_closes(monkeypatch, FakeClock(), today=date(2024, 3, 15), result=empty)
+    asyncio.run(fetch_closes("NOPE", date(2024, 3, 1), date(2024, 3, 8)))
+    asyncio.run(fetch_closes("NOPE", date(2024, 3, 1), date(2024, 3, 8)))
+    assert len(downloads) == 2
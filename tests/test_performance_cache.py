@@ -0,0 +1,75 @@
+"""
+Pruebas de PerformanceCache.rebase: ajustar un resultado guardado a un portafolio modificado debe dar lo mismo que
+recalcularlo desde cero.
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from performance_cache import PerformanceCache, PerformanceEntry
+
+
+START, END = date(2024, 1, 2), date(2024, 6, 28)
+RETURNS = {"AAPL": 0.12, "MSFT": -0.035, "GOOG": 0.2875, "NVDA": 1.41}
+PRICE_VERSIONS = {"AAPL": 3, "MSFT": 1, "GOOG": 2, "NVDA": 5}
+
+
+def compute(version: int, portfolio: dict[str, float]) -> PerformanceEntry:
+    """Resultado calculado desde cero, igual que la ruta de rendimiento."""
+    stocks = list(portfolio)
+    returns = np.array([RETURNS[stock] for stock in stocks])
+    weights = np.array([portfolio[stock] for stock in stocks]) / 100
+    price_versions = np.array([PRICE_VERSIONS[stock] for stock in stocks], dtype=np.int64)
+    return PerformanceEntry(version, stocks, returns, price_versions, float(returns @ weights))
+
+
+def lookup(symbol, start, end):
+    return RETURNS[symbol], PRICE_VERSIONS[symbol]
+
+
+@pytest.mark.parametrize(
+    "new",
+    [
+        {"AAPL": 30, "MSFT": 45, "GOOG": 25}, # Cambian pesos
+        {"AAPL": 50, "GOOG": 50}, # Se quita una acción
+        {"AAPL": 40, "MSFT": 35, "NVDA": 25}, # Se sustituye una acción
+        {"NVDA": 100}, # Se sustituyen todas
+    ],
+)
+def test_rebase_matches_recompute(new):
+    old = {"AAPL": 40, "MSFT": 35, "GOOG": 25}
+    cache = PerformanceCache(max_users=10)
+    cache.put("user", START, END, compute(1, old))
+
+    cache.rebase("user", 1, 2, old, new, lookup=lookup)
+
+    entry = cache.get("user", 2, START, END)
+    expected = compute(2, new)
+    assert entry is not None
+    assert entry.total == pytest.approx(expected.total, abs=1e-12)
+    assert entry.stocks == expected.stocks
+    assert entry.returns.tolist() == expected.returns.tolist()
+    assert entry.price_versions.tolist() == expected.price_versions.tolist()
+
+
+def test_rebase_drops_period_when_new_stock_is_unknown():
+    old = {"AAPL": 60, "MSFT": 40}
+    cache = PerformanceCache(max_users=10)
+    cache.put("user", START, END, compute(1, old))
+
+    cache.rebase("user", 1, 2, old, {"AAPL": 60, "NVDA": 40}, lookup=lambda symbol, start, end: None)
+
+    assert cache.get("user", 2, START, END) is None
+
+
+def test_rebase_ignores_results_of_another_version():
+    old = {"AAPL": 60, "MSFT": 40}
+    cache = PerformanceCache(max_users=10)
+    cache.put("user", START, END, compute(1, old))
+
+    cache.rebase("user", 7, 8, old, {"AAPL": 100}, lookup=lookup)
+
+    assert cache.get("user", 1, START, END) is None
+    assert cache.get("user", 8, START, END) is None
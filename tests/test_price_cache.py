@@ -0,0 +1,116 @@
+"""
+Pruebas de PriceCache con un proveedor que ajusta el historial como Yahoo: cada descarga devuelve los precios
+ajustados por los splits (Close) y los dividendos (Adj Close) ocurridos hasta el día en que se descarga.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_cache import PriceCache, to_day
+from trading_calendar import get_calendar
+
+
+SESSIONS = get_calendar("NYSE").sessions(date(2024, 3, 1), date(2024, 8, 1))
+RAW = 1000 + np.arange(len(SESSIONS)) * 2.5 # Precios negociados antes del split
+SPLIT_DAY, SPLIT = np.datetime64("2024-06-10"), 10.0
+DIVIDEND_DAY, DIVIDEND = np.datetime64("2024-06-20"), 0.4 # Dividendo por acción, después del split
+RAW[SESSIONS >= SPLIT_DAY] /= SPLIT
+
+
+class YahooLike:
+    """Proveedor falso: el historial descargado depende de la fecha de descarga (self.today)."""
+
+    def __init__(self):
+        self.today = date(2024, 6, 5)
+        self.calls = []
+        self.empty = False
+
+    def history(self, symbol, start, end):
+        self.calls.append((start, end))
+        today = np.datetime64(self.today)
+        known = SESSIONS <= today
+        close = RAW.copy()
+        close[SESSIONS < SPLIT_DAY] /= SPLIT if SPLIT_DAY <= today else 1 # Ajuste por el split
+        adjusted = close.copy()
+        if DIVIDEND_DAY <= today:
+            previous = close[SESSIONS < DIVIDEND_DAY][-1]
+            adjusted[SESSIONS < DIVIDEND_DAY] *= 1 - DIVIDEND / previous
+        splits = np.where(SESSIONS == SPLIT_DAY, SPLIT, 0.0)
+        dividends = np.where(SESSIONS == DIVIDEND_DAY, DIVIDEND, 0.0)
+        frame = pd.DataFrame(
+            {
+                "Open": close, "High": close, "Low": close, "Close": close, "Adj Close": adjusted,
+                "Volume": 1000.0, "Dividends": dividends, "Stock Splits": splits,
+            },
+            index=pd.DatetimeIndex(SESSIONS),
+        )
+        frame = frame[known & (SESSIONS >= np.datetime64(start)) & (SESSIONS < np.datetime64(end))]
+        return frame.iloc[:0] if self.empty else frame
+
+
+@pytest.fixture
+def provider():
+    return YahooLike()
+
+
+@pytest.fixture
+def cache(tmp_path, provider):
+    return PriceCache(str(tmp_path / "prices.sqlite"), provider.history, settled_end=lambda: provider.today)
+
+
+def raw(day: str) -> float:
+    return float(RAW[SESSIONS == np.datetime64(day)][0])
+
+
+def test_first_download_reaches_today(cache, provider):
+    cache.ensure("NVDA", date(2024, 4, 1), date(2024, 4, 10))
+    assert provider.calls == [(date(2024, 4, 1), date(2024, 6, 6))]
+    assert cache.missing_ranges("NVDA", date(2024, 4, 1), date(2024, 6, 5)) == []
+
+
+def test_downloads_before_and_after_a_split_are_consistent(cache, provider):
+    cache.ensure("NVDA", date(2024, 5, 1), date(2024, 6, 5))
+    provider.today = date(2024, 7, 31)
+    cache.ensure("NVDA", date(2024, 4, 1), date(2024, 7, 31)) # Amplía hacia atrás y hacia delante, ya con el split
+
+    history = cache.read_closes("NVDA", date(2024, 4, 1), date(2024, 7, 31))
+    expected = RAW[(SESSIONS >= np.datetime64("2024-04-01")) & (SESSIONS < np.datetime64("2024-07-31"))]
+    assert history.cents.tolist() == np.rint(expected * 100).tolist() # Precios sin ajustar, como se negociaron
+
+    # Rendimiento total del 1 de mayo al 1 de julio: split y dividendo incluidos
+    days = history.days.tolist()
+    first, last = days.index(to_day(date(2024, 5, 1))), days.index(to_day(date(2024, 7, 1)))
+    previous = raw("2024-06-18")
+    expected_return = raw("2024-07-01") * SPLIT / raw("2024-05-01") / (1 - DIVIDEND / previous)
+    assert history.adjusted[last] / history.adjusted[first] == pytest.approx(expected_return, rel=1e-6)
+
+
+def test_stored_bars_do_not_change(cache, provider):
+    cache.ensure("NVDA", date(2024, 5, 1), date(2024, 6, 5))
+    before = cache.read_closes("NVDA", date(2024, 5, 1), date(2024, 6, 5))
+    provider.today = date(2024, 7, 31)
+    cache.ensure("NVDA", date(2024, 5, 1), date(2024, 7, 31))
+    after = cache.read_closes("NVDA", date(2024, 5, 1), date(2024, 6, 5))
+    assert after.cents.tolist() == before.cents.tolist()
+    assert after.adjusted.tolist() == before.adjusted.tolist()
+
+
+def test_extensions_overlap_one_stored_session(cache, provider):
+    cache.ensure("NVDA", date(2024, 5, 1), date(2024, 6, 5))
+    provider.today = date(2024, 7, 31)
+    provider.calls.clear()
+    cache.ensure("NVDA", date(2024, 4, 1), date(2024, 7, 31))
+    assert sorted(provider.calls) == [(date(2024, 4, 1), date(2024, 5, 2)), (date(2024, 6, 4), date(2024, 8, 1))]
+
+
+def test_empty_download_is_not_marked_as_covered(cache, provider):
+    provider.empty = True
+    cache.ensure("NVDA", date(2024, 4, 1), date(2024, 4, 10))
+    assert cache.missing_ranges("NVDA", date(2024, 4, 1), date(2024, 4, 10)) == [(date(2024, 4, 1), date(2024, 4, 10))]
+
+    provider.empty = False
+    cache.ensure("NVDA", date(2024, 4, 1), date(2024, 4, 10))
+    assert len(cache.read_closes("NVDA", date(2024, 4, 1), date(2024, 4, 10))) == 7
@@ -0,0 +1,38 @@
+"""
+Pruebas del índice de cierres alineados (ReturnIndex): qué rangos faltan por cargar.
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from returns_index import ReturnIndex
+from timeseries import ClosePrices, day_numbers
+from trading_calendar import get_calendar
+
+
+nyse = get_calendar("NYSE")
+
+
+def test_needed_range_only_requests_what_is_missing():
+    index = ReturnIndex(nyse, date(2024, 1, 1))
+    assert index.needed_range("AAPL", date(2024, 3, 1), date(2024, 4, 1)) == (date(2024, 3, 1), date(2024, 4, 1))
+
+    sessions = nyse.sessions(date(2024, 3, 1), date(2024, 4, 1))
+    closes = np.arange(len(sessions)) + 100.0
+    index.add("AAPL", ClosePrices(day_numbers(sessions), closes, closes), date(2024, 3, 1), date(2024, 4, 1))
+    assert index.needed_range("aapl", date(2024, 3, 5), date(2024, 3, 20)) is None
+    # Más tarde que lo cargado: desde la primera sesión que falta
+    assert index.needed_range("AAPL", date(2024, 3, 5), date(2024, 4, 10)) == (date(2024, 4, 1), date(2024, 4, 10))
+    # Antes de lo cargado: hasta la primera sesión cargada
+    assert index.needed_range("AAPL", date(2024, 2, 1), date(2024, 3, 10)) == (date(2024, 2, 1), date(2024, 3, 1))
+
+
+def test_start_before_axis_is_rejected():
+    index = ReturnIndex(nyse, date(2024, 1, 1))
+    with pytest.raises(ValueError):
+        index.needed_range("AAPL", date(2023, 12, 1), date(2024, 2, 1))
+    with pytest.raises(ValueError):
+        index.returns(["AAPL"], date(2023, 12, 29), date(2024, 2, 1))
+    assert index.needed_range("AAPL", date(2024, 1, 1), date(2024, 2, 1)) == (date(2024, 1, 1), date(2024, 2, 1))
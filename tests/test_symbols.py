@@ -0,0 +1,27 @@
+"""
+Pruebas de la validación de símbolos: los que usa Yahoo Finance pasan, los que podrían salir de la carpeta no.
+"""
+
+import pytest
+
+from close_store import CloseStore
+from symbols import check_symbol, is_valid_symbol
+
+
+@pytest.mark.parametrize("symbol", ["AAPL", "aapl", "BRK-B", "BRK.B", "^GSPC", "EURUSD=X", "CL=F", "7203.T"])
+def test_yahoo_symbols_are_valid(symbol):
+    assert is_valid_symbol(symbol)
+
+
+@pytest.mark.parametrize("symbol", ["", "..", ".AAPL", "../AAPL", "A/B", "A\\B", "AAPL\n", "A B", "X" * 16])
+def test_path_like_symbols_are_rejected(symbol):
+    assert not is_valid_symbol(symbol)
+    with pytest.raises(ValueError):
+        check_symbol(symbol)
+
+
+def test_close_store_path_rejects_invalid_symbols(tmp_path):
+    store = CloseStore(str(tmp_path), price_cache=None)
+    assert store.path("brk-b") == str(tmp_path / "BRK-B.closes")
+    with pytest.raises(ValueError):
+        store.path("../../etc/passwd")
@@ -0,0 +1,39 @@
+"""
+Pruebas de nearest_indexer (búsqueda de la fecha más cercana).
+"""
+
+from datetime import date
+
+import numpy as np
+
+from timeseries import day_numbers, nearest_indexer
+
+
+INDEX = [date(2024, 3, 27), date(2024, 3, 28), date(2024, 4, 1)]
+
+
+def test_nearest_indexer_exact_and_outside():
+    targets = [date(2024, 3, 28), date(2024, 1, 1), date(2024, 12, 31)]
+    assert nearest_indexer(INDEX, targets).tolist() == [1, 0, 2]
+
+
+def test_nearest_indexer_tie_prefers_earlier():
+    # 30 de marzo está a dos días del 28 y del 1 de abril: gana la fecha anterior, como con min()
+    assert nearest_indexer(INDEX, [date(2024, 3, 30)]).tolist() == [1]
+    assert nearest_indexer(INDEX, [date(2024, 3, 31)]).tolist() == [2]
+
+
+def test_nearest_indexer_matches_min():
+    days = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-03-01"), 3)
+    index = [d.item() for d in days]
+    targets = [date(2023, 12, 25)] + [d.item() for d in np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-03-10"))]
+    expected = [min(range(len(index)), key=lambda k: abs(index[k] - target)) for target in targets]
+    assert nearest_indexer(index, targets).tolist() == expected
+
+
+def test_nearest_indexer_accepts_day_numbers():
+    assert nearest_indexer(day_numbers(INDEX), [date(2024, 3, 29)]).tolist() == [1]
+
+
+def test_nearest_indexer_empty_index():
+    assert nearest_indexer([], [date(2024, 3, 29), date(2024, 3, 30)]).tolist() == [-1, -1]
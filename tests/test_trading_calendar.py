@@ -0,0 +1,68 @@
+"""
+Pruebas del calendario bursátil: reglas de feriados de NYSE y sesiones alrededor de feriados.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from trading_calendar import get_calendar, nyse_holidays
+
+
+nyse = get_calendar("NYSE")
+
+
+def test_independence_day_on_weekend_is_observed():
+    assert date(2020, 7, 3) in nyse_holidays(2020) # Sábado 4 -> viernes 3
+    assert date(2021, 7, 5) in nyse_holidays(2021) # Domingo 4 -> lunes 5
+    assert date(2020, 7, 4) not in nyse_holidays(2020)
+
+
+def test_new_year_on_saturday_is_not_moved_to_previous_year():
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+    assert not any(d.month == 1 and d.day <= 3 for d in nyse_holidays(2022))
+
+
+def test_good_friday():
+    assert date(2024, 3, 29) in nyse_holidays(2024)
+    assert date(2025, 4, 18) in nyse_holidays(2025)
+
+
+def test_juneteenth_only_from_2022():
+    assert date(2021, 6, 18) not in nyse_holidays(2021)
+    assert date(2022, 6, 20) in nyse_holidays(2022) # Domingo 19 -> lunes 20
+    assert date(2023, 6, 19) in nyse_holidays(2023)
+
+
+def test_special_closures():
+    assert not nyse.is_session(date(2012, 10, 29)) # Huracán Sandy
+    assert not nyse.is_session(date(2025, 1, 9)) # Funeral de Jimmy Carter
+
+
+def test_previous_and_next_session_skip_holidays():
+    # Viernes Santo 2024 (29 de marzo): jueves 28 y lunes 1 de abril
+    assert nyse.next_session(date(2024, 3, 28)) == date(2024, 4, 1)
+    assert nyse.previous_session(date(2024, 4, 1)) == date(2024, 3, 28)
+    assert nyse.previous_session(date(2024, 3, 29)) == date(2024, 3, 28)
+    assert nyse.next_session(date(2024, 3, 29)) == date(2024, 4, 1)
+    # Navidad 2022 se observa el lunes 26
+    assert nyse.next_session(date(2022, 12, 23)) == date(2022, 12, 27)
+
+
+def test_previous_and_next_session_are_strict():
+    assert nyse.previous_session(date(2024, 3, 28)) == date(2024, 3, 27)
+    assert nyse.next_session(date(2024, 3, 27)) == date(2024, 3, 28)
+
+
+def test_nearest_session_tie_prefers_earlier():
+    # Sábado: el viernes y el lunes están a un día y dos días; domingo: a dos y un día
+    assert nyse.nearest_session(date(2024, 3, 23)) == date(2024, 3, 22)
+    assert nyse.nearest_session(date(2024, 3, 24)) == date(2024, 3, 25)
+    # Viernes Santo 2024: jueves y lunes no empatan (1 y 3 días); sábado 30 empata (2 días) -> jueves
+    assert nyse.nearest_session(date(2024, 3, 30)) == date(2024, 3, 28)
+
+
+def test_sessions_range_is_half_open():
+    sessions = nyse.sessions(date(2024, 3, 25), date(2024, 4, 2))
+    expected = ["2024-03-25", "2024-03-26", "2024-03-27", "2024-03-28", "2024-04-01"]
+    assert sessions.tolist() == np.array(expected, dtype="datetime64[D]").tolist()
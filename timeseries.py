@@ -0,0 +1,96 @@
+"""
+Utilidades vectorizadas para series de precios diarias.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+
+EPOCH = date(1970, 1, 1)
+
+
+class ClosePrices:
+    """
+    Historial compacto de un símbolo: solo las fechas y los precios de cierre, que es lo único que leen las rutas
+    de precios y rendimientos.
+
+    Ocupa 12 bytes por sesión (frente a un DataFrame con siete columnas float64 y un índice con zona horaria):
+    10.000 símbolos x 20 años caben en unos 600 MB.
+
+    Parámetros:
+    - days: Fechas como número de día desde 1970-01-01 (int32, ordenadas).
+    - cents: Precios de cierre sin ajustar, en centavos (int32, exactos hasta 21 millones de USD), uno por fecha.
+      Es el precio que devuelven las rutas (redondeado a dos decimales); float32 no distinguiría centavos por encima
+      de unos 131.000 USD (por ejemplo, BRK-A).
+    - adjusted: Cierres ajustados por splits y dividendos (float32), con escala arbitraria: solo sirven para calcular
+      rendimientos (cocientes entre dos días).
+    """
+
+    __slots__ = ("days", "cents", "adjusted")
+
+    def __init__(self, days: np.ndarray, cents: np.ndarray, adjusted: np.ndarray):
+        self.days = np.asarray(days, dtype=np.int32)
+        self.cents = np.asarray(cents, dtype=np.int32)
+        self.adjusted = np.asarray(adjusted, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.days) == 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + self.cents.nbytes + self.adjusted.nbytes
+
+    def date(self, position: int) -> date:
+        """Fecha de la posición indicada."""
+        return EPOCH + timedelta(days=int(self.days[position]))
+
+    def price(self, position: int) -> float:
+        """Precio de cierre (sin ajustar, en USD) de la posición indicada."""
+        return int(self.cents[position]) / 100
+
+
+def day_numbers(values) -> np.ndarray:
+    """
+    Convierte fechas en números de día desde 1970-01-01 (int64).
+
+    Parámetros:
+    - values: DatetimeIndex, lista de datetime.date o array de datetime64. Un array de enteros se devuelve tal cual.
+    """
+    if hasattr(values, "tz_localize"): # DatetimeIndex de pandas (se reconoce sin importar pandas)
+        if values.tz is not None:
+            values = values.tz_localize(None)
+        return values.values.astype("datetime64[D]").astype(np.int64)
+    array = np.asarray(values)
+    if array.dtype.kind in "iu":
+        return array.astype(np.int64)
+    return array.astype("datetime64[D]").astype(np.int64)
+
+
+def nearest_indexer(index, targets) -> np.ndarray:
+    """
+    Busca, para cada fecha de targets, la posición de la fecha más cercana en un índice ordenado.
+
+    Equivale a index.get_indexer(targets, method="nearest"), pero en un solo searchsorted de NumPy sobre números
+    de día y con el mismo desempate que min(): ante dos fechas a igual distancia gana la anterior.
+
+    Parámetros:
+    - index: Fechas ordenadas de forma ascendente (DatetimeIndex, fechas o números de día).
+    - targets: Fechas a resolver.
+
+    Retorna:
+    Array con la posición en index para cada fecha de targets (-1 si index está vacío).
+    """
+    days = day_numbers(index)
+    wanted = day_numbers(targets)
+    if len(days) == 0:
+        return np.full(len(wanted), -1, dtype=np.int64)
+
+    right = np.searchsorted(days, wanted, side="left").clip(max=len(days) - 1) # primera fecha >= objetivo (o la última)
+    left = (right - 1).clip(min=0) # fecha anterior
+    take_right = np.abs(days[right] - wanted) < np.abs(wanted - days[left]) # empate -> fecha anterior
+    return np.where(take_right, right, left)
@@ -0,0 +1,169 @@
+"""
+Calendario de sesiones bursátiles (NYSE / NASDAQ), calculado localmente.
+
+Permite saber qué días abre la bolsa (días hábiles que no son feriados) antes de pedir datos al proveedor,
+en lugar de descargar una ventana de días y esperar que contenga una sesión.
+"""
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+
+# Cierres extraordinarios de la bolsa de Nueva York (días completos) que no siguen ninguna regla fija.
+SPECIAL_CLOSURES = [
+    date(1985, 9, 27), # Huracán Gloria
+    date(1994, 4, 27), # Funeral de Richard Nixon
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14), # Atentados del 11 de septiembre
+    date(2004, 6, 11), # Funeral de Ronald Reagan
+    date(2007, 1, 2), # Funeral de Gerald Ford
+    date(2012, 10, 29), date(2012, 10, 30), # Huracán Sandy
+    date(2018, 12, 5), # Funeral de George H. W. Bush
+    date(2025, 1, 9), # Funeral de Jimmy Carter
+]
+
+
+def easter(year: int) -> date:
+    """Domingo de Pascua (algoritmo de Meeus/Jones/Butcher para el calendario gregoriano)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-ésimo día de la semana del mes (weekday: 0 = lunes; n = -1 para el último)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(holiday: date) -> date:
+    """Un feriado en sábado se observa el viernes anterior y uno en domingo, el lunes siguiente."""
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+def nyse_holidays(year: int) -> list[date]:
+    """
+    Feriados de la bolsa de Nueva York (NASDAQ cierra los mismos días) en un año.
+
+    Retorna:
+    Lista de fechas en que la bolsa cierra, ya trasladadas al día en que se observan.
+    """
+    holidays = [
+        nth_weekday(year, 2, 0, 3), # Día de los Presidentes: tercer lunes de febrero
+        easter(year) - timedelta(days=2), # Viernes Santo
+        nth_weekday(year, 5, 0, -1), # Memorial Day: último lunes de mayo
+        observed(date(year, 7, 4)), # Día de la Independencia
+        nth_weekday(year, 9, 0, 1), # Día del Trabajo: primer lunes de septiembre
+        nth_weekday(year, 11, 3, 4), # Acción de Gracias: cuarto jueves de noviembre
+        observed(date(year, 12, 25)), # Navidad
+    ]
+    # Año Nuevo: si cae en sábado no se traslada al viernes anterior (sería otro año).
+    if date(year, 1, 1).weekday() != 5:
+        holidays.append(observed(date(year, 1, 1)))
+    if year >= 1998:
+        holidays.append(nth_weekday(year, 1, 0, 3)) # Martin Luther King Jr.: tercer lunes de enero
+    if year >= 2022:
+        holidays.append(observed(date(year, 6, 19))) # Juneteenth
+    holidays.extend(d for d in SPECIAL_CLOSURES if d.year == year)
+    return sorted(holidays)
+
+
+class TradingCalendar:
+    """
+    Calendario de sesiones de una bolsa: días de lunes a viernes que no son feriados.
+
+    Los métodos con nombre en plural trabajan con arrays de datetime64[D] en una sola operación de NumPy.
+
+    Parámetros:
+    - name: Nombre de la bolsa (ejemplo: NYSE).
+    - holidays: Función que devuelve los feriados de un año.
+    - timezone: Zona horaria de la bolsa, para saber qué día es "hoy" allí.
+    - years: Rango de años (inicio, fin) para el que se calculan los feriados.
+    - settle_time: Hora local a partir de la cual el cierre del día se considera definitivo (cierre a las 16:00 más un
+      margen para que los proveedores publiquen el precio de la subasta de cierre).
+    """
+
+    def __init__(self, name: str, holidays, timezone: str = "America/New_York", years: tuple[int, int] = (1970, 2100),
+                 settle_time: time = time(16, 30)):
+        self.name = name
+        self.timezone = ZoneInfo(timezone)
+        self.settle_time = settle_time
+        self.holidays = np.array(
+            [d for year in range(years[0], years[1] + 1) for d in holidays(year)], dtype="datetime64[D]"
+        )
+        self._busdays = np.busdaycalendar(weekmask="1111100", holidays=self.holidays)
+
+    def today(self) -> date:
+        """Fecha actual en la zona horaria de la bolsa."""
+        return datetime.now(self.timezone).date()
+
+    def settled_end(self) -> date:
+        """
+        Primer día cuyo cierre todavía puede cambiar: hoy si aún no es settle_time, mañana si ya pasó.
+
+        Las sesiones anteriores a esta fecha tienen precios definitivos.
+        """
+        now = datetime.now(self.timezone)
+        return now.date() + timedelta(days=1) if now.time() >= self.settle_time else now.date()
+
+    def is_session(self, day: date) -> bool:
+        return bool(np.is_busday(np.datetime64(day, "D"), busdaycal=self._busdays))
+
+    def previous_sessions(self, days: np.ndarray) -> np.ndarray:
+        """Sesión inmediatamente anterior (estrictamente) a cada fecha."""
+        return np.busday_offset(days, -1, roll="forward", busdaycal=self._busdays)
+
+    def next_sessions(self, days: np.ndarray) -> np.ndarray:
+        """Sesión inmediatamente posterior (estrictamente) a cada fecha."""
+        return np.busday_offset(days, 1, roll="backward", busdaycal=self._busdays)
+
+    def nearest_sessions(self, days: np.ndarray) -> np.ndarray:
+        """Sesión más cercana a cada fecha (la propia fecha si es sesión; ante un empate, la anterior)."""
+        days = np.asarray(days, dtype="datetime64[D]")
+        before = np.busday_offset(days, 0, roll="backward", busdaycal=self._busdays)
+        after = np.busday_offset(days, 0, roll="forward", busdaycal=self._busdays)
+        return np.where(after - days < days - before, after, before)
+
+    def previous_session(self, day: date) -> date:
+        return self.previous_sessions(np.datetime64(day, "D")).item()
+
+    def next_session(self, day: date) -> date:
+        return self.next_sessions(np.datetime64(day, "D")).item()
+
+    def nearest_session(self, day: date) -> date:
+        return self.nearest_sessions(np.datetime64(day, "D")).item()
+
+    def last_session(self) -> date:
+        """Última sesión hasta hoy (incluida la de hoy si la bolsa abre)."""
+        return np.busday_offset(np.datetime64(self.today(), "D"), 0, roll="backward", busdaycal=self._busdays).item()
+
+    def sessions(self, start: date, end: date) -> np.ndarray:
+        """Sesiones en [start, end), como array de datetime64[D]."""
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+        return days[np.is_busday(days, busdaycal=self._busdays)]
+
+
+_nyse = TradingCalendar("NYSE", nyse_holidays)
+
+# Calendarios disponibles por nombre de bolsa (NASDAQ sigue los mismos feriados que NYSE).
+CALENDARS = {"NYSE": _nyse, "NASDAQ": _nyse}
+
+
+def get_calendar(exchange: str) -> TradingCalendar | None:
+    """Devuelve el calendario de la bolsa indicada, o None si no está soportada."""
+    return CALENDARS.get(exchange.upper())